@@ -0,0 +1,291 @@
+import ctypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+class AntColony:
+    """
+    Ant colony working on dense matrices indexed by node id.
+
+    Node 0 is the start, node n-1 the end and every tour visits exactly
+    `k` of the nodes in between. Pheromones are kept in an (n, n) matrix;
+    `choice` caches tau^alpha * eta^beta and is refreshed after every
+    pheromone update, so one ant step is a masked row lookup.
+
+    `native` is the loaded aco_probability library; when given, whole
+    iterations of tours are built by its `build_tours` in a single call.
+
+    `candidate_lists` (n, m) restricts every step to the m nearest
+    neighbours of the current node; the full unvisited set is scored only
+    when all of them have been visited.
+
+    `improve` (tour -> tour over the same nodes, e.g. a local search) is
+    applied to the best ant of every iteration before the pheromone update.
+    `pheromones` is an optional starting (n, n) table (copied), e.g. the
+    table of an earlier, similar search; otherwise all edges start at
+    `initial_pheromone`.
+    """
+
+    def __init__(self, distances: np.ndarray, k: int,
+                 alpha: float = 1.0, beta: float = 5.0,
+                 evaporation_rate: float = 0.5, pheromone_deposit: float = 100.0,
+                 initial_pheromone: float = 100.0, seed=None, native=None,
+                 heuristic: np.ndarray = None, candidate_lists: np.ndarray = None, improve=None,
+                 pheromones: np.ndarray = None):
+        self.distances = np.ascontiguousarray(distances, dtype=np.float64)
+        self.n = len(self.distances)
+        self.k = k
+        self.alpha = alpha
+        self.beta = beta
+        self.evaporation_rate = evaporation_rate
+        self.pheromone_deposit = pheromone_deposit
+        self.rng = np.random.default_rng(seed)
+        self.native = native
+        self.improve = improve
+        # Stan generatora po stronie C (xorshift64*, nie może być zerem)
+        self._rng_state = np.array([self.rng.integers(1, 2**63)], dtype=np.uint64)
+
+        if self.n - 2 < k:
+            raise ValueError(f"Not enough intermediate points ({self.n - 2}) for k={k}")
+
+        if pheromones is not None:
+            if pheromones.shape != (self.n, self.n):
+                raise ValueError(f"pheromones must be {self.n}x{self.n}")
+            self.pheromones = np.array(pheromones, dtype=np.float64)
+        else:
+            self.pheromones = np.full((self.n, self.n), initial_pheromone, dtype=np.float64)
+        self.heuristic = heuristic if heuristic is not None else (1.0 / (self.distances + 1e-6)) ** beta
+        self.choice = None
+        self._update_choice()
+
+        self.candidate_lists = None
+        if candidate_lists is not None and candidate_lists.shape[1] > 0:
+            self.candidate_lists = np.ascontiguousarray(candidate_lists, dtype=np.int32)
+
+        self.best_tour = None
+        self.best_length = float('inf')
+
+    def _update_choice(self):
+        if self.alpha == 1:
+            self.choice = self.pheromones * self.heuristic
+        else:
+            self.choice = self.pheromones ** self.alpha * self.heuristic
+
+    def tour_length(self, tour: np.ndarray) -> float:
+        return float(self.distances[tour[:-1], tour[1:]].sum())
+
+    def reinforce(self, tour, amount: float):
+        """Adds `amount` of pheromone on every edge of the tour (both directions)."""
+        tour = np.asarray(tour, dtype=np.intp)
+        a, b = tour[:-1], tour[1:]
+        np.add.at(self.pheromones, (a, b), amount)
+        np.add.at(self.pheromones, (b, a), amount)
+        self._update_choice()
+
+    def construct_tour(self) -> np.ndarray:
+        tour = np.empty(self.k + 2, dtype=np.intp)
+        tour[0] = 0
+        tour[-1] = self.n - 1
+
+        unvisited = np.ones(self.n, dtype=bool)
+        unvisited[0] = unvisited[-1] = False
+
+        current = 0
+        for step in range(1, self.k + 1):
+            next_node = -1
+
+            if self.candidate_lists is not None:
+                listed = self.candidate_lists[current]
+                chosen = self._roulette(self.choice[current, listed] * unvisited[listed])
+                if chosen >= 0:
+                    next_node = int(listed[chosen])
+
+            if next_node < 0:
+                next_node = self._roulette(self.choice[current] * unvisited)
+
+            if next_node < 0:
+                next_node = int(self.rng.choice(np.flatnonzero(unvisited)))
+
+            tour[step] = next_node
+            unvisited[next_node] = False
+            current = next_node
+
+        return tour
+
+    def _roulette(self, weights: np.ndarray) -> int:
+        """Index drawn proportionally to `weights`, or -1 if they sum to zero."""
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        if total <= 0:
+            return -1
+        # Ruletka: pierwszy indeks, dla którego suma skumulowana przekracza r
+        r = self.rng.random() * total
+        chosen = min(int(np.searchsorted(cumulative, r, side='right')), len(weights) - 1)
+        if weights[chosen] <= 0:
+            chosen = int(np.flatnonzero(weights[:chosen])[-1])
+        return chosen
+
+    def _construct_tours_native(self, num_ants: int) -> tuple[np.ndarray, np.ndarray]:
+        tours = np.empty((num_ants, self.k + 2), dtype=np.int32)
+        lengths = np.empty(num_ants, dtype=np.float64)
+        double_p = ctypes.POINTER(ctypes.c_double)
+
+        status = self.native.build_tours(
+            self.pheromones.ctypes.data_as(double_p),
+            self.distances.ctypes.data_as(double_p),
+            self.n, self.k, num_ants,
+            ctypes.c_double(self.alpha),
+            ctypes.c_double(self.beta),
+            self.candidate_lists.ctypes.data_as(ctypes.POINTER(ctypes.c_int)) if self.candidate_lists is not None else None,
+            self.candidate_lists.shape[1] if self.candidate_lists is not None else 0,
+            self._rng_state.ctypes.data_as(ctypes.POINTER(ctypes.c_ulonglong)),
+            tours.ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+            lengths.ctypes.data_as(double_p)
+        )
+        if status != 0:
+            raise MemoryError("build_tours could not allocate its work buffers")
+        return tours.astype(np.intp), lengths
+
+    def deposit(self, tours: np.ndarray, lengths: np.ndarray):
+        """Evaporates all pheromones, then lets every ant deposit Q / length on its edges."""
+        self.pheromones *= (1 - self.evaporation_rate)
+
+        amounts = self.pheromone_deposit / (lengths + 1e-6)
+        edges_per_tour = tours.shape[1] - 1
+        a = tours[:, :-1].ravel()
+        b = tours[:, 1:].ravel()
+        w = np.repeat(amounts, edges_per_tour)
+        np.add.at(self.pheromones, (a, b), w)
+        np.add.at(self.pheromones, (b, a), w)
+        self._update_choice()
+
+    def iterate(self, num_ants: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Runs one iteration: builds `num_ants` tours, updates the best tour
+        and the pheromones. Returns the tours and their lengths.
+        """
+        if self.native is not None:
+            tours, lengths = self._construct_tours_native(num_ants)
+        else:
+            tours = np.empty((num_ants, self.k + 2), dtype=np.intp)
+            lengths = np.empty(num_ants, dtype=np.float64)
+
+            for ant in range(num_ants):
+                tours[ant] = self.construct_tour()
+                lengths[ant] = self.tour_length(tours[ant])
+
+        if self.improve is not None:
+            ant = int(np.argmin(lengths))
+            tours[ant] = self.improve(tours[ant])
+            lengths[ant] = self.tour_length(tours[ant])
+
+        self._update_best(tours, lengths)
+        self.deposit(tours, lengths)
+        return tours, lengths
+
+    def _update_best(self, tours: np.ndarray, lengths: np.ndarray):
+        ant = int(np.argmin(lengths))
+        if lengths[ant] < self.best_length:
+            self.best_length = float(lengths[ant])
+            self.best_tour = tours[ant].copy()
+
+
+class MultiColony:
+    """
+    Independent ant colonies (island model) run side by side on a thread pool.
+
+    Each colony gets its own random stream spawned from `seed`, so results
+    depend only on the seed and the number of colonies, not on scheduling.
+    Every `exchange_interval` iterations the colonies synchronize: the best
+    tour found so far is reinforced in every colony and each pheromone
+    matrix is blended towards the colonies' mean by `migration_rate`.
+
+    The threads only run in parallel while the GIL is released, i.e. inside
+    the C `build_tours` call (native) and large NumPy operations.
+    """
+
+    def __init__(self, distances: np.ndarray, k: int, colonies: int = 4, workers: int = None,
+                 exchange_interval: int = 5, migration_rate: float = 0.1,
+                 seed=None, native=None, **colony_params):
+        distances = np.ascontiguousarray(distances, dtype=np.float64)
+        heuristic = colony_params.pop('heuristic', None)
+        if heuristic is None:
+            beta = colony_params.get('beta', 5.0)
+            heuristic = (1.0 / (distances + 1e-6)) ** beta
+
+        seeds = np.random.SeedSequence(seed).spawn(colonies)
+        self.colonies = [
+            AntColony(distances, k, seed=s, native=native, heuristic=heuristic, **colony_params)
+            for s in seeds
+        ]
+        self.exchange_interval = max(1, exchange_interval)
+        self.migration_rate = migration_rate
+        self.pheromone_deposit = self.colonies[0].pheromone_deposit
+        self.workers = workers or min(colonies, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._iteration = 0
+
+    def __enter__(self) -> 'MultiColony':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+
+    @property
+    def best_length(self) -> float:
+        return min(colony.best_length for colony in self.colonies)
+
+    @property
+    def best_tour(self) -> np.ndarray:
+        best = min(self.colonies, key=lambda colony: colony.best_length)
+        return best.best_tour
+
+    @property
+    def pheromones(self) -> np.ndarray:
+        """Mean pheromone table of the colonies."""
+        mean = np.zeros_like(self.colonies[0].pheromones)
+        for colony in self.colonies:
+            mean += colony.pheromones
+        return mean / len(self.colonies)
+
+    def reinforce(self, tour, amount: float):
+        for colony in self.colonies:
+            colony.reinforce(tour, amount)
+
+    def iterate(self, num_ants: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Runs one iteration in every colony (`num_ants` ants each) and
+        exchanges results when due. Returns the tours and lengths of all
+        colonies, in colony order.
+        """
+        results = list(self._executor.map(lambda colony: colony.iterate(num_ants), self.colonies))
+
+        self._iteration += 1
+        if self._iteration % self.exchange_interval == 0:
+            self._exchange()
+
+        tours = np.concatenate([tours for tours, _ in results])
+        lengths = np.concatenate([lengths for _, lengths in results])
+        return tours, lengths
+
+    def _exchange(self):
+        # min() zwraca pierwszą najlepszą kolonię - kolejność jest stała, więc wynik deterministyczny
+        best = min(self.colonies, key=lambda colony: colony.best_length)
+        best_tour, best_length = best.best_tour, best.best_length
+
+        if self.migration_rate > 0:
+            mean = self.pheromones
+
+        for colony in self.colonies:
+            if self.migration_rate > 0:
+                colony.pheromones *= (1 - self.migration_rate)
+                colony.pheromones += self.migration_rate * mean
+            if best_length < colony.best_length:
+                colony.best_tour = best_tour.copy()
+                colony.best_length = best_length
+            colony.reinforce(best_tour, self.pheromone_deposit / (best_length + 1e-6))
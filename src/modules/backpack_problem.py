@@ -1,3 +1,7 @@
+import numpy as np
+
+from modules.knapsack import solve_knapsack
+
 objects = [
     ('mysz polna', 45, [0.4, 0.125, 0.2]),
     ('mysz domowa', 28, [0.4, 0.125, 0.2]),
@@ -8,57 +12,41 @@ objects = [
 cat_names = ['Luna', 'Ariana', 'Dante']
 capacity = 2000
 
-# Dla każdego kota
-for cat_index in range(3):
-    items = []
-    original_values = []
-    volumes = []
-    
-    for obj in objects:
-        vol = obj[1]
-        orig_val = obj[2][cat_index]
-        new_val = 1 + orig_val
-        items.append((vol, new_val))
-        original_values.append(orig_val)
-        volumes.append(vol)
-    
-    n_items = len(items)
-    
-    dp = [-10**9] * (capacity + 1)
-    dp[0] = 0
-    parent = [-1] * (capacity + 1)
-    
-    for j in range(1, capacity + 1):
-        for i in range(n_items):
-            vol, new_val = items[i]
-            if j >= vol:
-                if dp[j] < dp[j - vol] + new_val:
-                    dp[j] = dp[j - vol] + new_val
-                    parent[j] = i
-    
-    max_val = -10**9
-    j_max = 0
-    for j in range(capacity + 1):
-        if dp[j] > max_val:
-            max_val = dp[j]
-            j_max = j
-    
-    counts = [0] * n_items
-    j = j_max
-    while j > 0:
-        i = parent[j]
-        if i == -1:
-            break
-        counts[i] += 1
-        j -= volumes[i]
-    
-    total_objects = sum(counts)
-    total_original_value = sum(counts[i] * original_values[i] for i in range(n_items))
-    score = 0.5 * total_objects + 0.5 * total_original_value
-    
 
-    print(f"Cat: {cat_names[cat_index]}")
-    print(f"  Objects: field_mouse={counts[0]}, house_mouse={counts[1]}, snail={counts[2]}, leaf={counts[3]}, rock={counts[4]}")
-    print(f"  Total objects: {total_objects}")
-    print(f"  Total value: {total_original_value:.2f}")
-    print(f"  Score: {score:.2f}\n")
\ No newline at end of file
+def solve_backpacks(objects=objects, cat_names=cat_names, capacity=capacity, bounds=None) -> list[dict]:
+    """
+    Best backpack of every cat (all solved in one DP pass). Each object is
+    worth 1 + its value for the cat, so both the count and the value count.
+    """
+    volumes = np.array([obj[1] for obj in objects], dtype=np.int64)
+    original_values = np.array([obj[2] for obj in objects], dtype=np.float64).T  # (koty, obiekty)
+
+    solution = solve_knapsack(volumes, 1 + original_values, capacity, bounds=bounds)
+
+    results = []
+    for cat_index, cat in enumerate(cat_names):
+        counts = solution['counts'][cat_index]
+        total_objects = int(counts.sum())
+        total_original_value = float(np.dot(counts, original_values[cat_index]))
+        results.append({
+            'cat': cat,
+            'counts': counts,
+            'total_objects': total_objects,
+            'total_value': total_original_value,
+            'score': 0.5 * total_objects + 0.5 * total_original_value
+        })
+    return results
+
+
+def main():
+    for result in solve_backpacks():
+        counts = result['counts']
+        print(f"Cat: {result['cat']}")
+        print(f"  Objects: field_mouse={counts[0]}, house_mouse={counts[1]}, snail={counts[2]}, leaf={counts[3]}, rock={counts[4]}")
+        print(f"  Total objects: {result['total_objects']}")
+        print(f"  Total value: {result['total_value']:.2f}")
+        print(f"  Score: {result['score']:.2f}\n")
+
+
+if __name__ == "__main__":
+    main()
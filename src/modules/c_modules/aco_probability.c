@@ -1,4 +1,6 @@
 #include <math.h>
+#include <stdlib.h>
+#include <string.h>
 
 void calculate_probabilities(double* probabilities, 
                             double* pheromones, 
@@ -18,4 +20,369 @@ void calculate_probabilities(double* probabilities,
     for(int i = 0; i < n_points; i++) {
         probabilities[i] /= total;
     }
-}
\ No newline at end of file
+}
+
+// Generator xorshift64* - stan przekazywany z Pythona, żeby wyniki były powtarzalne
+static double next_random(unsigned long long* state) {
+    unsigned long long x = *state;
+    x ^= x >> 12;
+    x ^= x << 25;
+    x ^= x >> 27;
+    *state = x;
+    return ((x * 2685821657736338717ULL) >> 11) * (1.0 / 9007199254740992.0);
+}
+
+static double edge_weight(const double* pheromones, const double* distances,
+                          long long idx, double alpha, double beta) {
+    double tau = alpha == 1.0 ? pheromones[idx] : pow(pheromones[idx], alpha);
+    return tau * pow(1.0/(distances[idx] + 1e-6), beta);
+}
+
+// Ruletka po wagach; zwraca pozycję w tablicy weights albo -1, gdy suma wag jest zerowa
+static int roulette(const double* weights, int n, double total, unsigned long long* rng_state) {
+    if(total <= 0.0) {
+        return -1;
+    }
+    double r = next_random(rng_state) * total;
+    double cumulative = 0.0;
+    int last = -1;
+    for(int j = 0; j < n; j++) {
+        if(weights[j] <= 0.0) {
+            continue;
+        }
+        last = j;
+        cumulative += weights[j];
+        if(r < cumulative) {
+            return j;
+        }
+    }
+    return last;
+}
+
+// Buduje pełne trasy dla num_ants mrówek w jednym wywołaniu.
+// Węzeł 0 to start, n-1 to koniec, każda trasa odwiedza dokładnie k węzłów pośrednich.
+// candidate_lists (n x list_size, może być NULL) ogranicza wybór do najbliższych sąsiadów;
+// pełny zbiór jest przeglądany tylko, gdy wszyscy sąsiedzi z listy są już odwiedzeni.
+// tours: num_ants x (k + 2), lengths: num_ants. Zwraca 0 lub -1 przy braku pamięci.
+int build_tours(const double* pheromones,
+                const double* distances,
+                int n,
+                int k,
+                int num_ants,
+                double alpha,
+                double beta,
+                const int* candidate_lists,
+                int list_size,
+                unsigned long long* rng_state,
+                int* tours,
+                double* lengths) {
+    long long nn = (long long)n * n;
+    int use_lists = candidate_lists != NULL && list_size > 0;
+    double* choice = use_lists ? NULL : (double*)malloc(sizeof(double) * nn);
+    double* weights = (double*)malloc(sizeof(double) * n);
+    char* visited = (char*)malloc(n);
+
+    if((!use_lists && !choice) || !weights || !visited) {
+        free(choice);
+        free(weights);
+        free(visited);
+        return -1;
+    }
+
+    // Bez list kandydatów: tau^alpha * eta^beta liczone raz na wywołanie zamiast w każdym kroku
+    if(!use_lists) {
+        for(long long i = 0; i < nn; i++) {
+            choice[i] = edge_weight(pheromones, distances, i, alpha, beta);
+        }
+    }
+
+    for(int ant = 0; ant < num_ants; ant++) {
+        int* tour = tours + (long long)ant * (k + 2);
+        double length = 0.0;
+        int current = 0;
+
+        memset(visited, 0, n);
+        visited[0] = 1;
+        visited[n - 1] = 1;
+        tour[0] = 0;
+
+        for(int step = 1; step <= k; step++) {
+            long long row = (long long)current * n;
+            int next = -1;
+
+            if(use_lists) {
+                const int* listed = candidate_lists + (long long)current * list_size;
+                double total = 0.0;
+                for(int j = 0; j < list_size; j++) {
+                    int node = listed[j];
+                    double w = visited[node] ? 0.0 : edge_weight(pheromones, distances, row + node, alpha, beta);
+                    weights[j] = w;
+                    total += w;
+                }
+                int chosen = roulette(weights, list_size, total, rng_state);
+                if(chosen >= 0) {
+                    next = listed[chosen];
+                }
+            }
+
+            if(next < 0) {
+                double total = 0.0;
+                for(int j = 0; j < n; j++) {
+                    double w = 0.0;
+                    if(!visited[j]) {
+                        w = use_lists ? edge_weight(pheromones, distances, row + j, alpha, beta) : choice[row + j];
+                    }
+                    weights[j] = w;
+                    total += w;
+                }
+                next = roulette(weights, n, total, rng_state);
+            }
+
+            if(next < 0) {
+                // Wszystkie wagi zerowe - losowy nieodwiedzony węzeł
+                int remaining = n - 1 - step;
+                int target = (int)(next_random(rng_state) * remaining);
+                for(int j = 0; j < n; j++) {
+                    if(!visited[j] && target-- == 0) {
+                        next = j;
+                        break;
+                    }
+                }
+            }
+
+            tour[step] = next;
+            visited[next] = 1;
+            length += distances[row + next];
+            current = next;
+        }
+
+        tour[k + 1] = n - 1;
+        length += distances[(long long)current * n + (n - 1)];
+        lengths[ant] = length;
+    }
+
+    free(choice);
+    free(weights);
+    free(visited);
+    return 0;
+}
+
+// ---------------------------------------------------------------------------
+// Lokalne poprawianie ścieżki otwartej (2-opt + Or-opt) ze stałym początkiem i końcem.
+// Miasta to pozycje 0..m-1 we współrzędnych xs/ys; order[p] to miasto na pozycji p
+// (order[0] i order[m-1] nie zmieniają miejsca). neighbours: m x list_size najbliższych
+// miast (najbliższe pierwsze). Miasta czekają w kolejce (bity "don't look" = brak w kolejce);
+// ruch jest szukany tylko wokół miast z kolejki, po ruchu jego końce wracają do kolejki.
+
+#define LS_EPS 1e-9
+
+static double ls_dist(const double* xs, const double* ys, int a, int b) {
+    double dx = xs[a] - xs[b];
+    double dy = ys[a] - ys[b];
+    return sqrt(dx * dx + dy * dy);
+}
+
+typedef struct {
+    int* items;
+    char* queued;
+    int head, count, size;
+} ls_queue;
+
+static void ls_push(ls_queue* q, int city) {
+    if(q->queued[city]) {
+        return;
+    }
+    q->queued[city] = 1;
+    q->items[(q->head + q->count) % q->size] = city;
+    q->count++;
+}
+
+static int ls_pop(ls_queue* q) {
+    int city = q->items[q->head];
+    q->head = (q->head + 1) % q->size;
+    q->count--;
+    q->queued[city] = 0;
+    return city;
+}
+
+static void ls_reverse(int* order, int* pos, int lo, int hi) {
+    while(lo < hi) {
+        int t = order[lo];
+        order[lo] = order[hi];
+        order[hi] = t;
+        pos[order[lo]] = lo;
+        pos[order[hi]] = hi;
+        lo++;
+        hi--;
+    }
+}
+
+// Przenosi odcinek pozycji [start, start+len) za miasto `after` (spoza odcinka), opcjonalnie odwrócony
+static void ls_move_segment(int* order, int* pos, int start, int len, int after, int reversed) {
+    int segment[8];
+    for(int t = 0; t < len; t++) {
+        segment[t] = order[start + (reversed ? len - 1 - t : t)];
+    }
+    int target = pos[after];
+    int first;
+    if(target < start) {
+        memmove(order + target + 1 + len, order + target + 1, sizeof(int) * (start - target - 1));
+        first = target + 1;
+        for(int p = first + len; p < start + len; p++) pos[order[p]] = p;
+    } else {
+        memmove(order + start, order + start + len, sizeof(int) * (target - start - len + 1));
+        first = target - len + 1;
+        for(int p = start; p < first; p++) pos[order[p]] = p;
+    }
+    for(int t = 0; t < len; t++) {
+        order[first + t] = segment[t];
+        pos[segment[t]] = first + t;
+    }
+}
+
+static int ls_two_opt(const double* xs, const double* ys, int m, int* order, int* pos,
+                      const int* neighbours, int list_size, ls_queue* q, int a) {
+    for(int dir = 1; dir >= -1; dir -= 2) {
+        int i = pos[a];
+        if((dir == 1 && i == m - 1) || (dir == -1 && i == 0)) {
+            continue;
+        }
+        int a1 = order[i + dir];
+        double d1 = ls_dist(xs, ys, a, a1);
+        const int* listed = neighbours + (long long)a * list_size;
+
+        for(int t = 0; t < list_size; t++) {
+            int c = listed[t];
+            double d2 = ls_dist(xs, ys, a, c);
+            if(d2 >= d1) {
+                break;
+            }
+            int j = pos[c];
+            if((dir == 1 && j == m - 1) || (dir == -1 && j == 0)) {
+                continue;
+            }
+            int c1 = order[j + dir];
+            if(c1 == a || c == a1) {
+                continue;
+            }
+            double delta = d2 + ls_dist(xs, ys, a1, c1) - d1 - ls_dist(xs, ys, c, c1);
+            if(delta < -LS_EPS) {
+                if(dir == 1) {
+                    if(i < j) ls_reverse(order, pos, i + 1, j);
+                    else ls_reverse(order, pos, j + 1, i);
+                } else {
+                    if(i < j) ls_reverse(order, pos, i, j - 1);
+                    else ls_reverse(order, pos, j, i - 1);
+                }
+                ls_push(q, a);
+                ls_push(q, a1);
+                ls_push(q, c);
+                ls_push(q, c1);
+                return 1;
+            }
+        }
+    }
+    return 0;
+}
+
+static int ls_or_opt(const double* xs, const double* ys, int m, int* order, int* pos,
+                     const int* neighbours, int list_size, int max_segment, ls_queue* q, int a) {
+    int i = pos[a];
+    for(int len = 1; len <= max_segment; len++) {
+        int last = i + len - 1;
+        if(i < 1 || last > m - 2) {
+            break;
+        }
+        int s1 = a, se = order[last];
+        int p = order[i - 1], nx = order[last + 1];
+        double gain = ls_dist(xs, ys, p, s1) + ls_dist(xs, ys, se, nx) - ls_dist(xs, ys, p, nx);
+        if(gain <= LS_EPS) {
+            continue;
+        }
+
+        for(int side = 0; side < 2; side++) {
+            int e = side == 0 ? s1 : se;
+            int f = side == 0 ? se : s1;
+            const int* listed = neighbours + (long long)e * list_size;
+
+            for(int t = 0; t < list_size; t++) {
+                int c = listed[t];
+                double d2 = ls_dist(xs, ys, e, c);
+                if(d2 >= gain) {
+                    break;
+                }
+                int j = pos[c];
+                if(j >= i && j <= last) {
+                    continue;
+                }
+
+                // Wstawienie za c: c, e..f, cn
+                if(j <= m - 2) {
+                    int cn = j == i - 1 ? nx : order[j + 1];
+                    double delta = d2 + ls_dist(xs, ys, f, cn) - ls_dist(xs, ys, c, cn) - gain;
+                    if(delta < -LS_EPS) {
+                        ls_move_segment(order, pos, i, len, c, side == 1);
+                        ls_push(q, p); ls_push(q, nx); ls_push(q, s1); ls_push(q, se);
+                        ls_push(q, c); ls_push(q, cn);
+                        return 1;
+                    }
+                }
+                // Wstawienie przed c: cp, f..e, c
+                if(j >= 1) {
+                    int cp = j == last + 1 ? p : order[j - 1];
+                    double delta = d2 + ls_dist(xs, ys, cp, f) - ls_dist(xs, ys, cp, c) - gain;
+                    if(delta < -LS_EPS) {
+                        ls_move_segment(order, pos, i, len, cp, side == 0);
+                        ls_push(q, p); ls_push(q, nx); ls_push(q, s1); ls_push(q, se);
+                        ls_push(q, c); ls_push(q, cp);
+                        return 1;
+                    }
+                }
+            }
+        }
+    }
+    return 0;
+}
+
+// Zwraca liczbę wykonanych ruchów albo -1 przy braku pamięci
+int improve_path(const double* xs, const double* ys, int m, int* order,
+                 const int* neighbours, int list_size, int max_segment) {
+    if(max_segment > 8) {
+        max_segment = 8;
+    }
+    int* pos = (int*)malloc(sizeof(int) * m);
+    ls_queue q;
+    q.items = (int*)malloc(sizeof(int) * m);
+    q.queued = (char*)calloc(m, 1);
+    q.head = 0;
+    q.count = 0;
+    q.size = m;
+    if(!pos || !q.items || !q.queued) {
+        free(pos);
+        free(q.items);
+        free(q.queued);
+        return -1;
+    }
+
+    for(int p = 0; p < m; p++) {
+        pos[order[p]] = p;
+    }
+    for(int p = 0; p < m; p++) {
+        ls_push(&q, order[p]);
+    }
+
+    int moves = 0;
+    while(q.count > 0) {
+        int a = ls_pop(&q);
+        if(ls_two_opt(xs, ys, m, order, pos, neighbours, list_size, &q, a)
+           || ls_or_opt(xs, ys, m, order, pos, neighbours, list_size, max_segment, &q, a)) {
+            ls_push(&q, a);
+            moves++;
+        }
+    }
+
+    free(pos);
+    free(q.items);
+    free(q.queued);
+    return moves;
+}
@@ -0,0 +1,42 @@
+// Jądra DP plecaka na wierszach long long (wartości przeskalowane do liczb całkowitych)
+
+// Nieograniczona liczba sztuk jednego przedmiotu: dp[j] = max(dp[j], dp[j - volume] + value),
+// j rosnąco (w miejscu), parent[j] = item przy każdej poprawie (parent == NULL - bez rodziców)
+void knapsack_unbounded_pass(long long* dp, int* parent, long long length,
+                             long long volume, long long value, int item) {
+    for(long long j = volume; j < length; j++) {
+        long long candidate = dp[j - volume] + value;
+        if(candidate > dp[j]) {
+            dp[j] = candidate;
+            if(parent) parent[j] = item;
+        }
+    }
+}
+
+// To samo z rodzicami int16 (do 32767 przedmiotów)
+void knapsack_unbounded_pass_short(long long* dp, short* parent, long long length,
+                                   long long volume, long long value, int item) {
+    for(long long j = volume; j < length; j++) {
+        long long candidate = dp[j - volume] + value;
+        if(candidate > dp[j]) {
+            dp[j] = candidate;
+            if(parent) parent[j] = (short)item;
+        }
+    }
+}
+
+// Jeden element 0/1 (kawałek z podziału binarnego): j malejąco, decyzje jako bity
+// (bit j - weight, najstarszy bit bajtu pierwszy - jak np.packbits; bits == NULL - bez decyzji)
+void knapsack_binary_pass(long long* dp, unsigned char* bits, long long length,
+                          long long weight, long long gain) {
+    for(long long j = length - 1; j >= weight; j--) {
+        long long candidate = dp[j - weight] + gain;
+        if(candidate > dp[j]) {
+            dp[j] = candidate;
+            if(bits) {
+                long long bit = j - weight;
+                bits[bit >> 3] |= (unsigned char)(0x80 >> (bit & 7));
+            }
+        }
+    }
+}
@@ -4,4 +4,53 @@ double point_distance(int x1, int y1, int x2, int y2) {
     long dx = x2 - x1;
     long dy = y2 - y1;
     return sqrt(dx*dx + dy*dy);
-}
\ No newline at end of file
+}
+
+// Odległości od jednego punktu do n punktów (bufory x, y bez kopiowania)
+void distances_one_to_many(int x, int y,
+                           const int* xs, const int* ys, int n,
+                           double* out) {
+    for(int i = 0; i < n; i++) {
+        double dx = (double)xs[i] - x;
+        double dy = (double)ys[i] - y;
+        out[i] = sqrt(dx*dx + dy*dy);
+    }
+}
+
+// Macierz odległości n_a x n_b (jak cdist), zapis wierszami
+void distances_pairwise(const int* ax, const int* ay, int n_a,
+                        const int* bx, const int* by, int n_b,
+                        double* out) {
+    for(int i = 0; i < n_a; i++) {
+        double x = ax[i];
+        double y = ay[i];
+        double* row = out + (long long)i * n_b;
+        for(int j = 0; j < n_b; j++) {
+            double dx = bx[j] - x;
+            double dy = by[j] - y;
+            row[j] = sqrt(dx*dx + dy*dy);
+        }
+    }
+}
+
+// Długość ścieżki przechodzącej przez n punktów w podanej kolejności
+double path_length(const int* xs, const int* ys, int n) {
+    double total = 0.0;
+    for(int i = 0; i + 1 < n; i++) {
+        double dx = (double)xs[i + 1] - xs[i];
+        double dy = (double)ys[i + 1] - ys[i];
+        total += sqrt(dx*dx + dy*dy);
+    }
+    return total;
+}
+
+// Długość ścieżki po punktach wskazanych indeksami (bez kopiowania współrzędnych)
+double path_length_indexed(const int* xs, const int* ys, const long long* indices, int n) {
+    double total = 0.0;
+    for(int i = 0; i + 1 < n; i++) {
+        double dx = (double)xs[indices[i + 1]] - xs[indices[i]];
+        double dy = (double)ys[indices[i + 1]] - ys[indices[i]];
+        total += sqrt(dx*dx + dy*dy);
+    }
+    return total;
+}
@@ -0,0 +1,162 @@
+from collections import OrderedDict
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from modules.common.point import distances_to, pairwise_distances, path_length
+from modules.common.point_set import PointSet
+
+# Domyślna największa liczba punktów, dla których trzymana jest pełna macierz odległości
+DENSE_LIMIT = 4000
+
+
+class DistanceOracle:
+    """
+    Distances between the points of one PointSet, addressed by position.
+
+    For up to `dense_limit` points the full matrix is computed in a single
+    vectorized pass, the first time a row or the matrix is needed (single
+    distances and paths do not build it). Bigger sets compute whole rows
+    on demand and keep the most recently used ones, up to `max_cache_bytes`.
+    """
+
+    def __init__(self, points: PointSet, dense_limit: int = DENSE_LIMIT,
+                 dtype=np.float64, max_cache_bytes: int = 256 * 1024 * 1024):
+        self.points = points
+        self.n = len(points)
+        self.dtype = np.dtype(dtype)
+        self.dense_limit = dense_limit
+        self.max_cache_bytes = max_cache_bytes
+        self.dense = self.n <= dense_limit
+        self._matrix = None
+        self._rows = OrderedDict()
+
+        row_bytes = max(1, self.n * self.dtype.itemsize)
+        self._max_rows = max(1, max_cache_bytes // row_bytes)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the cached matrix and rows."""
+        matrix = self._matrix.nbytes if self._matrix is not None else 0
+        return matrix + sum(row.nbytes for row in self._rows.values())
+
+    def _compute_matrix(self) -> np.ndarray:
+        xs, ys = self.points.x, self.points.y
+        return pairwise_distances(xs, ys, xs, ys).astype(self.dtype, copy=False)
+
+    def _dense_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = self._compute_matrix()
+        return self._matrix
+
+    def row(self, i: int) -> np.ndarray:
+        """Distances from point `i` to all points (read-only view for the dense case)."""
+        if self.dense:
+            return self._dense_matrix()[i]
+
+        row = self._rows.get(i)
+        if row is not None:
+            self._rows.move_to_end(i)
+            return row
+
+        row = distances_to(self.points.x[i], self.points.y[i], self.points.x, self.points.y)
+        row = row.astype(self.dtype, copy=False)
+        self._rows[i] = row
+        if len(self._rows) > self._max_rows:
+            self._rows.popitem(last=False)
+        return row
+
+    def distance(self, i: int, j: int) -> float:
+        if self._matrix is not None:
+            return float(self._matrix[i, j])
+        if i in self._rows:
+            return float(self._rows[i][j])
+        if j in self._rows:
+            return float(self._rows[j][i])
+        dx = float(self.points.x[i]) - float(self.points.x[j])
+        dy = float(self.points.y[i]) - float(self.points.y[j])
+        return float(np.sqrt(dx * dx + dy * dy))
+
+    __call__ = distance
+
+    def distances(self, i: int, indices) -> np.ndarray:
+        """Distances from point `i` to the points at the given positions only."""
+        indices = np.asarray(indices, dtype=np.intp)
+        if self._matrix is not None:
+            return self._matrix[i, indices]
+        # Zapytania o większość zbioru idą przez pamięć podręczną wierszy (np. początek / koniec ścieżki)
+        if i in self._rows or (not self.dense and 2 * len(indices) >= self.n):
+            return self.row(i)[indices]
+        return distances_to(self.points.x[i], self.points.y[i], self.points.x[indices], self.points.y[indices])
+
+    def neighbour_lists(self, size: int, indices=None) -> np.ndarray:
+        """
+        For every point, the positions of its `size` nearest neighbours
+        (closest first, excluding the point itself), found with a k-d tree.
+        With `indices`, neighbours are taken only from those positions.
+        """
+        targets = np.arange(self.n) if indices is None else np.asarray(indices, dtype=np.intp)
+        size = min(size, len(targets) - 1)
+        if size <= 0:
+            return np.empty((self.n, 0), dtype=np.intp)
+
+        tree = cKDTree(np.column_stack((self.points.x[targets], self.points.y[targets])))
+        _, found = tree.query(self.points.coordinates(), k=size + 1)
+        found = targets[found]
+
+        # Usuń sam punkt z jego listy (albo ostatniego sąsiada, jeśli punktu nie ma na liście)
+        is_self = found == np.arange(self.n)[:, None]
+        is_self[~is_self.any(axis=1), -1] = True
+        return found[~is_self].reshape(self.n, size)
+
+    def matrix(self) -> np.ndarray:
+        """
+        Full distance matrix (computed once, on first use). Only available
+        up to `dense_limit` points; bigger sets raise ValueError instead of
+        allocating n^2 values - use row(), distances(), submatrix() or
+        full_matrix().
+        """
+        if not self.dense:
+            raise ValueError(f"Full distance matrix of {self.n} points exceeds dense_limit={self.dense_limit}")
+        return self._dense_matrix()
+
+    def full_matrix(self) -> np.ndarray:
+        """
+        Full distance matrix whatever the size: the cached one up to
+        `dense_limit` points, otherwise computed in one pass and not kept
+        (for callers that need all n^2 values anyway, like ACO).
+        """
+        if self.dense:
+            return self._dense_matrix()
+        return self._compute_matrix()
+
+    def subset(self, indices, dense_limit: int = None) -> 'DistanceOracle':
+        """
+        Oracle over the points at the given positions (in that order), with
+        this one's `dense_limit` unless given. If both are dense, its matrix
+        is sliced from this one's instead of being recomputed.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        if dense_limit is None:
+            dense_limit = self.dense_limit
+        oracle = DistanceOracle(self.points.take(indices), dense_limit, self.dtype, self.max_cache_bytes)
+        if self.dense and oracle.dense:
+            oracle._matrix = self._dense_matrix()[np.ix_(indices, indices)]
+        return oracle
+
+    def submatrix(self, indices) -> np.ndarray:
+        """Distance matrix between the points at the given positions."""
+        indices = np.asarray(indices, dtype=np.intp)
+        if self._matrix is not None:
+            return self._matrix[np.ix_(indices, indices)]
+        xs, ys = self.points.x[indices], self.points.y[indices]
+        return pairwise_distances(xs, ys, xs, ys).astype(self.dtype, copy=False)
+
+    def path_length(self, indices) -> float:
+        """Length of the path visiting the given positions in order."""
+        indices = np.asarray(indices, dtype=np.intp)
+        if len(indices) < 2:
+            return 0.0
+        if self._matrix is not None:
+            return float(self._matrix[indices[:-1], indices[1:]].sum(dtype=np.float64))
+        return path_length(self.points.x, self.points.y, indices)
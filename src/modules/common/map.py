@@ -1,12 +1,35 @@
 import os
+from itertools import islice
+
+import numpy as np
 
 from modules.common.point import Point
+from modules.common.point_set import PointSet
 from modules.common.path import Path
 
+# Binarny format mapy: nagłówek + int32 x[n] + int32 y[n] (+ opcjonalnie int32 cluster_id[n], -1 poza siatką)
+BINARY_MAGIC = b"UMAP"
+BINARY_VERSION = 1
+BINARY_FLAG_CLUSTERS = 1
+BINARY_HEADER = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("flags", "<u2"),
+    ("count", "<u8"),
+    ("cluster_size", "<i4"),
+    ("grid_size", "<i4"),
+])
+
+
 class Map:
-    def __init__(self, name: str, points: list[Point] = None):
+    def __init__(self, name: str, points: list[Point] | PointSet = None,
+                 cluster_ids: np.ndarray = None, cluster_size: int = None, grid_size: int = None):
         self.name = name
         self.points = points if points is not None else []
+        # Opcjonalne, wcześniej policzone numery klastrów (z formatu binarnego)
+        self.cluster_ids = cluster_ids
+        self.cluster_size = cluster_size
+        self.grid_size = grid_size
     
     def save_to_file(self, directory: str = "data"):
         """
@@ -15,27 +38,166 @@ class Map:
         """
         filepath = os.path.join(directory, f"{self.name}.txt")
         with open(filepath, "w") as file:
-            file.writelines([f"{point.x} % {point.y}\n" for point in self.points])
+            if isinstance(self.points, PointSet):
+                file.writelines(f"{x} % {y}\n" for x, y in zip(self.points.x.tolist(), self.points.y.tolist()))
+            else:
+                file.writelines([f"{point.x} % {point.y}\n" for point in self.points])
 
     @staticmethod
-    def load_from_file(filepath: str, scale = 1) -> 'Map':
+    def load_from_file(filepath: str, scale = 1, block_lines: int = 262144) -> 'Map':
         """
         Loads a map from a file and returns a Map instance.
+        Points are returned as a PointSet; ids are line order of valid lines.
+        The file is parsed in blocks of `block_lines` lines (see iter_blocks).
         """
-        points = []
+        blocks = list(Map.iter_blocks(filepath, scale, block_lines))
+        points = PointSet.concatenate(blocks)
+        # Identyfikatory to kolejne numery punktów - nie trzeba ich trzymać w pamięci
+        points = PointSet(points.x, points.y)
 
-        with open(filepath, 'r') as file:
-            for line in file:
-                try:
-                    x_str, y_str = line.split(" % ")
-                    if scale == 1:
-                        points.append(Point(int(x_str), int(y_str)))
-                    else:
-                        x = int(float(x_str) * 100)
-                        y = int(float(y_str) * 100)
-                        points.append(Point(x, y))
-                except ValueError:
-                    continue
-        
         name = os.path.splitext(os.path.basename(filepath))[0]
         return Map(name, points)
+
+    @staticmethod
+    def iter_blocks(filepath: str, scale = 1, block_lines: int = 262144):
+        """
+        Streams a text map ("x % y" per line) as PointSet blocks of at most
+        `block_lines` lines each, so the whole file is never held in memory.
+        Ids continue across blocks. Invalid lines are skipped; with scale != 1
+        the coordinates are read as floats and multiplied by 100.
+        """
+        offset = 0
+        with open(filepath, 'r') as file:
+            while True:
+                lines = list(islice(file, block_lines))
+                if not lines:
+                    break
+                xs, ys = _parse_lines(lines, scale)
+                yield PointSet(xs, ys, np.arange(offset, offset + len(xs), dtype=np.int64))
+                offset += len(xs)
+
+    def save_binary(self, directory: str = "data", cluster_size: int = None, map_size: int = None) -> str:
+        """
+        Saves the map in the binary format (`<name>.bin`) and returns its path.
+        With `cluster_size` and `map_size` the cluster id of every point
+        (as in custers.create_clusters) is precomputed and stored as well.
+        """
+        filepath = os.path.join(directory, f"{self.name}.bin")
+        points = self.points if isinstance(self.points, PointSet) else PointSet.from_points(self.points)
+        _write_binary(filepath, points, cluster_size, map_size)
+        return filepath
+
+    @staticmethod
+    def load_binary(filepath: str, mmap: bool = True) -> 'Map':
+        """
+        Loads a map saved with save_binary. With `mmap` the coordinate arrays
+        are numpy.memmap views of the file (nothing is copied or parsed).
+        """
+        header = np.fromfile(filepath, dtype=BINARY_HEADER, count=1)
+        if len(header) == 0 or header["magic"][0] != BINARY_MAGIC:
+            raise ValueError(f"{filepath} is not a binary map file")
+        if header["version"][0] != BINARY_VERSION:
+            raise ValueError(f"Unsupported binary map version: {header['version'][0]}")
+
+        count = int(header["count"][0])
+        has_clusters = bool(header["flags"][0] & BINARY_FLAG_CLUSTERS)
+        columns = 3 if has_clusters else 2
+
+        offset = BINARY_HEADER.itemsize
+        if mmap:
+            data = np.memmap(filepath, dtype="<i4", mode="r", offset=offset, shape=(columns, count))
+        else:
+            data = np.fromfile(filepath, dtype="<i4", count=columns * count, offset=offset).reshape(columns, count)
+
+        cluster_ids = None
+        cluster_size = None
+        grid_size = None
+        if has_clusters:
+            cluster_ids = data[2]
+            cluster_size = int(header["cluster_size"][0])
+            grid_size = int(header["grid_size"][0])
+
+        name = os.path.splitext(os.path.basename(filepath))[0]
+        return Map(name, PointSet(data[0], data[1]), cluster_ids, cluster_size, grid_size)
+
+
+def _parse_lines(lines: list[str], scale = 1) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parses a block of "x % y" lines with NumPy's C text parser.
+    Falls back to line-by-line parsing for blocks with lines the fast
+    path cannot reproduce exactly (e.g. floats with scale == 1).
+    """
+    text = "".join(lines)
+    if not (text.count("%") == text.count(" % ") == len(lines)):
+        # Linie bez dokładnie jednego " % " i tak byłyby pominięte przez split(" % ")
+        lines = [line for line in lines if line.count("%") == 1 and " % " in line]
+
+    if lines:
+        try:
+            dtype = np.int64 if scale == 1 else np.float64
+            values = np.loadtxt(lines, delimiter="%", dtype=dtype, comments=None, ndmin=2)
+            if scale == 1:
+                return values[:, 0].copy(), values[:, 1].copy()
+            if np.isfinite(values).all():
+                values = (values * 100).astype(np.int64)
+                return values[:, 0].copy(), values[:, 1].copy()
+        except ValueError:
+            pass
+
+    xs = []
+    ys = []
+    for line in lines:
+        try:
+            x_part, y_part = line.split(" % ")
+            if scale == 1:
+                x, y = int(x_part), int(y_part)
+            else:
+                x = int(float(x_part) * 100)
+                y = int(float(y_part) * 100)
+            xs.append(x)
+            ys.append(y)
+        except ValueError:
+            continue
+    return np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64)
+
+
+def _write_binary(filepath: str, points: PointSet, cluster_size: int = None, map_size: int = None):
+    if len(points) and (points.x.max() > np.iinfo(np.int32).max or points.y.max() > np.iinfo(np.int32).max
+                        or points.x.min() < np.iinfo(np.int32).min or points.y.min() < np.iinfo(np.int32).min):
+        raise ValueError("Coordinates do not fit in int32")
+
+    header = np.zeros(1, dtype=BINARY_HEADER)
+    header["magic"] = BINARY_MAGIC
+    header["version"] = BINARY_VERSION
+    header["count"] = len(points)
+
+    cluster_ids = None
+    if cluster_size is not None and map_size is not None:
+        grid_size = map_size // cluster_size
+        cols, rows = points.x // cluster_size, points.y // cluster_size
+        # Punkty poza siatką dostają -1 - inaczej numer trafiłby do komórki z sąsiedniego wiersza
+        inside = (cols >= 0) & (cols < grid_size) & (rows >= 0) & (rows < grid_size)
+        cluster_ids = np.where(inside, rows * grid_size + cols, -1)
+        header["flags"] = BINARY_FLAG_CLUSTERS
+        header["cluster_size"] = cluster_size
+        header["grid_size"] = grid_size
+
+    with open(filepath, "wb") as file:
+        header.tofile(file)
+        points.x.astype("<i4", copy=False).tofile(file)
+        points.y.astype("<i4", copy=False).tofile(file)
+        if cluster_ids is not None:
+            cluster_ids.astype("<i4", copy=False).tofile(file)
+
+
+def convert_text_to_binary(source: str, destination: str = None, scale=1,
+                           cluster_size: int = None, map_size: int = None) -> str:
+    """
+    Converts a text map ("x % y" per line) to the binary format.
+    `scale` has the same meaning as in Map.load_from_file. Returns the output path.
+    """
+    if destination is None:
+        destination = os.path.splitext(source)[0] + ".bin"
+    map = Map.load_from_file(source, scale)
+    _write_binary(destination, map.points, cluster_size, map_size)
+    return destination
@@ -1,4 +1,5 @@
-from modules.common.point import Point
+from modules.common.point import Point, path_length
+from modules.common.point_set import PointSet
 
 class Path:
     def __init__(self, start: Point, end: Point, points: list[Point]):
@@ -7,7 +8,5 @@ class Path:
         self.points = points
 
     def distance(self) -> float:
-        dist = 0
-        for i in range(len(self.points) - 1):
-            dist += Point.distance(self.points[i], self.points[i + 1])
-        return dist
\ No newline at end of file
+        coordinates = PointSet.from_points(self.points)
+        return path_length(coordinates.x, coordinates.y)
\ No newline at end of file
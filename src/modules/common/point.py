@@ -5,7 +5,14 @@ import os
 import pathlib
 import platform 
 
+import numpy as np
+
 USE_C_IMPLEMENTATION = True 
+# Funkcje wsadowe (jedno wywołanie C na cały bufor) - starsze biblioteki ich nie mają
+USE_C_BATCH = False
+
+_int_p = ctypes.POINTER(ctypes.c_int)
+_double_p = ctypes.POINTER(ctypes.c_double)
 
 try:
     if USE_C_IMPLEMENTATION:
@@ -17,14 +24,107 @@ try:
         distance_lib.point_distance.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
         distance_lib.point_distance.restype = ctypes.c_double
         print(f"Successfully loaded C distance library: {lib_path}")
+
+        try:
+            distance_lib.distances_one_to_many.argtypes = [ctypes.c_int, ctypes.c_int, _int_p, _int_p, ctypes.c_int, _double_p]
+            distance_lib.distances_one_to_many.restype = None
+            distance_lib.distances_pairwise.argtypes = [_int_p, _int_p, ctypes.c_int, _int_p, _int_p, ctypes.c_int, _double_p]
+            distance_lib.distances_pairwise.restype = None
+            distance_lib.path_length.argtypes = [_int_p, _int_p, ctypes.c_int]
+            distance_lib.path_length.restype = ctypes.c_double
+            distance_lib.path_length_indexed.argtypes = [_int_p, _int_p, ctypes.POINTER(ctypes.c_longlong), ctypes.c_int]
+            distance_lib.path_length_indexed.restype = ctypes.c_double
+            USE_C_BATCH = True
+        except AttributeError:
+            print("C distance library has no batch functions, using NumPy")
 except Exception as e:
     print(f"Error loading C distance library: {e}")
     USE_C_IMPLEMENTATION = False
 
+
+def _c_buffer(array: np.ndarray) -> bool:
+    """True if the array can be handed to C as int32* without a copy."""
+    return array.dtype == np.int32 and array.flags.c_contiguous
+
+
+def distances_to(x: int, y: int, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Distances from (x, y) to every point of the coordinate arrays (one C call)."""
+    n = len(xs)
+    if USE_C_BATCH and _c_buffer(xs) and _c_buffer(ys):
+        out = np.empty(n, dtype=np.float64)
+        distance_lib.distances_one_to_many(
+            int(x), int(y),
+            xs.ctypes.data_as(_int_p), ys.ctypes.data_as(_int_p), n,
+            out.ctypes.data_as(_double_p)
+        )
+        return out
+    dx = np.asarray(xs, dtype=np.float64) - x
+    dy = np.asarray(ys, dtype=np.float64) - y
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def pairwise_distances(ax: np.ndarray, ay: np.ndarray, bx: np.ndarray, by: np.ndarray) -> np.ndarray:
+    """(len(a), len(b)) matrix of distances between two coordinate sets (one C call)."""
+    n_a, n_b = len(ax), len(bx)
+    if USE_C_BATCH and all(_c_buffer(a) for a in (ax, ay, bx, by)):
+        out = np.empty((n_a, n_b), dtype=np.float64)
+        distance_lib.distances_pairwise(
+            ax.ctypes.data_as(_int_p), ay.ctypes.data_as(_int_p), n_a,
+            bx.ctypes.data_as(_int_p), by.ctypes.data_as(_int_p), n_b,
+            out.ctypes.data_as(_double_p)
+        )
+        return out
+    dx = np.asarray(ax, dtype=np.float64)[:, None] - np.asarray(bx, dtype=np.float64)[None, :]
+    dy = np.asarray(ay, dtype=np.float64)[:, None] - np.asarray(by, dtype=np.float64)[None, :]
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def path_length(xs: np.ndarray, ys: np.ndarray, indices: np.ndarray = None) -> float:
+    """
+    Length of the path through the points in order (or through
+    `xs[indices], ys[indices]` if indices are given), in one C call.
+    """
+    if USE_C_BATCH and _c_buffer(xs) and _c_buffer(ys):
+        if indices is None:
+            return distance_lib.path_length(xs.ctypes.data_as(_int_p), ys.ctypes.data_as(_int_p), len(xs))
+        indices = np.ascontiguousarray(indices, dtype=np.int64)
+        return distance_lib.path_length_indexed(
+            xs.ctypes.data_as(_int_p), ys.ctypes.data_as(_int_p),
+            indices.ctypes.data_as(ctypes.POINTER(ctypes.c_longlong)), len(indices)
+        )
+    if indices is not None:
+        xs, ys = xs[indices], ys[indices]
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    return float(np.sqrt(np.diff(xs) ** 2 + np.diff(ys) ** 2).sum())
+
 class Point:
-    def __init__(self, x: int, y: int):
+    """
+    Single point on the map.
+
+    `id` is the stable index of the point inside the PointSet it was taken
+    from (None for free-standing points). Points with ids compare by id,
+    the rest by identity.
+    """
+    __slots__ = ("x", "y", "id")
+
+    def __init__(self, x: int, y: int, id: int = None):
         self.x = x
         self.y = y
+        self.id = id
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Point):
+            return NotImplemented
+        if self.id is None or other.id is None:
+            return self is other
+        return self.id == other.id
+
+    def __hash__(self) -> int:
+        return hash(self.id) if self.id is not None else object.__hash__(self)
+
+    def __repr__(self) -> str:
+        return f"Point({self.x}, {self.y}, id={self.id})"
 
     @staticmethod
     def distance(p1: 'Point', p2: 'Point') -> float:
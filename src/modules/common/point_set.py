@@ -0,0 +1,113 @@
+import numpy as np
+
+from modules.common.point import Point
+
+_INT32_MIN = np.iinfo(np.int32).min
+_INT32_MAX = np.iinfo(np.int32).max
+
+
+def _coordinate_array(values) -> np.ndarray:
+    """
+    Returns contiguous int32 coordinates (int64 if they do not fit).
+    Contiguous int32 arrays (also memory-mapped ones) are used without a copy.
+    """
+    array = np.asarray(values)
+    if array.dtype == np.int32:
+        return np.ascontiguousarray(array)
+    if array.size and (array.min() < _INT32_MIN or array.max() > _INT32_MAX):
+        return np.ascontiguousarray(array, dtype=np.int64)
+    return np.ascontiguousarray(array, dtype=np.int32)
+
+
+class PointSet:
+    """
+    Array-backed collection of points.
+
+    Coordinates are stored in two contiguous integer arrays `x` and `y`.
+    Every point has a stable integer id (its index in the original map by
+    default), which is kept when taking subsets, so points selected by
+    clustering still refer to the same map points.
+    Indexing with an int returns a lightweight `Point` view.
+    """
+
+    def __init__(self, x, y, ids=None):
+        self.x = _coordinate_array(x)
+        self.y = _coordinate_array(y)
+        if self.x.shape != self.y.shape or self.x.ndim != 1:
+            raise ValueError("x and y must be 1D arrays of the same length")
+        self._ids = None if ids is None else np.ascontiguousarray(ids, dtype=np.int64)
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Stable point ids (implicit 0..n-1 if none were given)."""
+        if self._ids is None:
+            return np.arange(len(self.x), dtype=np.int64)
+        return self._ids
+
+    @staticmethod
+    def from_points(points: list[Point]) -> 'PointSet':
+        """
+        Builds a PointSet from a list of Point objects.
+        Point ids are kept if every point has one.
+        """
+        ids = None
+        if points and all(p.id is not None for p in points):
+            ids = [p.id for p in points]
+        return PointSet([p.x for p in points], [p.y for p in points], ids)
+
+    @staticmethod
+    def concatenate(point_sets: list['PointSet']) -> 'PointSet':
+        if not point_sets:
+            return PointSet(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32))
+        x = np.concatenate([ps.x for ps in point_sets])
+        y = np.concatenate([ps.y for ps in point_sets])
+        ids = np.concatenate([ps.ids for ps in point_sets])
+        return PointSet(x, y, ids)
+
+    def coordinates(self) -> np.ndarray:
+        """Returns an (n, 2) array of x, y coordinates."""
+        return np.column_stack((self.x, self.y))
+
+    def take(self, indices) -> 'PointSet':
+        """Returns the subset at the given positions, keeping the ids."""
+        indices = np.asarray(indices)
+        indices = np.flatnonzero(indices) if indices.dtype == bool else indices.astype(np.intp, copy=False)
+        ids = self._ids[indices] if self._ids is not None else indices
+        return PointSet(self.x[indices], self.y[indices], ids)
+
+    def point(self, i: int) -> Point:
+        return Point(int(self.x[i]), int(self.y[i]), int(self._ids[i]) if self._ids is not None else int(i))
+
+    def to_points(self) -> list[Point]:
+        ids = self.ids.tolist()
+        return [Point(x, y, i) for x, y, i in zip(self.x.tolist(), self.y.tolist(), ids)]
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __iter__(self):
+        ids = self._ids if self._ids is not None else range(len(self))
+        for x, y, i in zip(self.x.tolist(), self.y.tolist(), ids):
+            yield Point(x, y, int(i))
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError("PointSet index out of range")
+            return self.point(key)
+        if isinstance(key, slice):
+            ids = self._ids[key] if self._ids is not None else np.arange(*key.indices(len(self)))
+            return PointSet(self.x[key], self.y[key], ids)
+        return self.take(key)
+
+    def __repr__(self) -> str:
+        return f"PointSet({len(self)} points, dtype={self.x.dtype})"
+
+
+def as_point_set(points: list[Point] | PointSet) -> PointSet:
+    """Returns `points` as a PointSet (no copy if it already is one)."""
+    if isinstance(points, PointSet):
+        return points
+    return PointSet.from_points(points)
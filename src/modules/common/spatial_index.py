@@ -0,0 +1,210 @@
+from math import floor, inf, sqrt
+
+import numpy as np
+
+
+class GridIndex:
+    """
+    Uniform grid over a set of 2D points, with deletion.
+
+    Points are bucketed into square cells of `cell_size` and stored in CSR
+    layout: `order[offsets[c]:offsets[c + 1]]` are the point indices of
+    cell `c = row * n_cols + col`. Removed points stay in the arrays and
+    are skipped through the `alive` mask, so removal is O(1).
+
+    Queries (nearest-k, radius, rectangle) return point indices (positions
+    in the arrays the index was built from), nearest-k sorted by distance
+    and then by index.
+
+    `origin` and `shape` (n_cols, n_rows) fix the grid, e.g. to the map's
+    cluster grid; points outside it are not indexed (see `outside`).
+    Precomputed cell ids (e.g. cluster ids stored in a binary map) can be
+    passed as `cells`; ids outside the grid count as outside.
+    """
+
+    def __init__(self, x, y, cell_size: float = None, origin: tuple = None, shape: tuple = None,
+                 cells: np.ndarray = None):
+        # Współrzędne całkowite zostają w swoim typie (bez kopii), odległości liczone są w float64
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        if self.x.dtype.kind not in "iuf":
+            self.x = self.x.astype(np.float64)
+            self.y = self.y.astype(np.float64)
+        n = len(self.x)
+
+        if origin is None:
+            origin = (float(self.x.min()), float(self.y.min())) if n else (0.0, 0.0)
+        self.origin = origin
+
+        if cell_size is None:
+            # Około 2 punkty na komórkę
+            width = float(self.x.max()) - origin[0] if n else 1.0
+            height = float(self.y.max()) - origin[1] if n else 1.0
+            cell_size = max(sqrt(max(width * height, 1.0) * 2.0 / max(n, 1)), 1e-9)
+        self.cell_size = cell_size
+
+        if cells is None:
+            cols = np.floor((self.x - origin[0]) / cell_size).astype(np.int64)
+            rows = np.floor((self.y - origin[1]) / cell_size).astype(np.int64)
+
+            if shape is None:
+                shape = (int(cols.max()) + 1 if n else 1, int(rows.max()) + 1 if n else 1)
+            self.n_cols, self.n_rows = shape
+            self.n_cells = self.n_cols * self.n_rows
+
+            inside = (cols >= 0) & (cols < self.n_cols) & (rows >= 0) & (rows < self.n_rows)
+            self.cell_of = np.full(n, -1, dtype=np.int64)
+            self.cell_of[inside] = rows[inside] * self.n_cols + cols[inside]
+        else:
+            if shape is None:
+                raise ValueError("shape is required with precomputed cells")
+            self.n_cols, self.n_rows = shape
+            self.n_cells = self.n_cols * self.n_rows
+
+            self.cell_of = np.asarray(cells, dtype=np.int64)
+            inside = (self.cell_of >= 0) & (self.cell_of < self.n_cells)
+            self.cell_of = np.where(inside, self.cell_of, -1)
+
+        self.outside = np.flatnonzero(~inside)
+
+        indexed = np.flatnonzero(inside)
+        self.order = indexed[np.argsort(self.cell_of[indexed], kind="stable")]
+        self.offsets = np.searchsorted(self.cell_of[self.order], np.arange(self.n_cells + 1))
+
+        self.alive = inside.copy()
+        self.cell_counts = np.diff(self.offsets)
+        self._alive_total = len(self.order)
+
+    def __len__(self) -> int:
+        return self._alive_total
+
+    def remove(self, i: int):
+        """Removes point `i` from the index (e.g. once it has been collected)."""
+        if self.alive[i]:
+            self.alive[i] = False
+            self.cell_counts[self.cell_of[i]] -= 1
+            self._alive_total -= 1
+
+    def cell_members(self, cell: int) -> np.ndarray:
+        """Alive point indices in the given cell."""
+        members = self.order[self.offsets[cell]:self.offsets[cell + 1]]
+        return members[self.alive[members]]
+
+    def _cell_coordinates(self, x: float, y: float) -> tuple[int, int]:
+        col = floor((x - self.origin[0]) / self.cell_size)
+        row = floor((y - self.origin[1]) / self.cell_size)
+        return min(max(col, 0), self.n_cols - 1), min(max(row, 0), self.n_rows - 1)
+
+    def _cells_in_block(self, col0: int, row0: int, col1: int, row1: int) -> np.ndarray:
+        col0, row0 = max(col0, 0), max(row0, 0)
+        col1, row1 = min(col1, self.n_cols - 1), min(row1, self.n_rows - 1)
+        if col0 > col1 or row0 > row1:
+            return np.empty(0, dtype=np.int64)
+        cols = np.arange(col0, col1 + 1)
+        rows = np.arange(row0, row1 + 1)
+        return (rows[:, None] * self.n_cols + cols[None, :]).ravel()
+
+    def _ring_cells(self, col: int, row: int, r0: int, r1: int) -> np.ndarray:
+        """Cells of rings r0..r1 around (col, row): the block of radius r1 without the one of radius r0 - 1."""
+        cols = np.arange(max(col - r1, 0), min(col + r1, self.n_cols - 1) + 1)
+        rows = np.arange(max(row - r1, 0), min(row + r1, self.n_rows - 1) + 1)
+        cells = rows[:, None] * self.n_cols + cols[None, :]
+        if r0 == 0:
+            return cells.ravel()
+        outer = (np.abs(rows - row)[:, None] >= r0) | (np.abs(cols - col)[None, :] >= r0)
+        return cells[outer]
+
+    def _points_in_cells(self, cells: np.ndarray) -> np.ndarray:
+        cells = cells[self.cell_counts[cells] > 0]
+        if len(cells) == 0:
+            return np.empty(0, dtype=np.int64)
+        # Sklejenie zakresów order[offsets[c]:offsets[c + 1]] bez pętli po komórkach
+        starts = self.offsets[cells]
+        lengths = self.offsets[cells + 1] - starts
+        ends = np.cumsum(lengths)
+        positions = np.arange(ends[-1]) + np.repeat(starts - (ends - lengths), lengths)
+        members = self.order[positions]
+        return members[self.alive[members]]
+
+    def _distances(self, x: float, y: float, indices: np.ndarray) -> np.ndarray:
+        dx = self.x[indices].astype(np.float64) - x
+        dy = self.y[indices].astype(np.float64) - y
+        return np.sqrt(dx * dx + dy * dy)
+
+    def _covered_radius(self, x: float, y: float, col: int, row: int, r: int) -> float:
+        """Radius around (x, y) inside which every cell has been visited after ring r."""
+        x0 = self.origin[0] + (col - r) * self.cell_size
+        y0 = self.origin[1] + (row - r) * self.cell_size
+        x1 = self.origin[0] + (col + r + 1) * self.cell_size
+        y1 = self.origin[1] + (row + r + 1) * self.cell_size
+        margins = [
+            x - x0 if col - r > 0 else inf,
+            x1 - x if col + r < self.n_cols - 1 else inf,
+            y - y0 if row - r > 0 else inf,
+            y1 - y if row + r < self.n_rows - 1 else inf,
+        ]
+        return max(min(margins), 0.0)
+
+    def nearest_k(self, x: float, y: float, k: int) -> np.ndarray:
+        """Indices of the k nearest alive points, closest first (ties by index)."""
+        k = min(k, self._alive_total)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        col, row = self._cell_coordinates(x, y)
+        max_ring = max(col, row, self.n_cols - 1 - col, self.n_rows - 1 - row)
+
+        # Pierścienie przeglądane są w coraz szerszych pasach (1, 2, 4, ... pierścienie naraz),
+        # więc przy pustych okolicach liczba kroków rośnie logarytmicznie
+        found = []
+        count = 0
+        r0, width = 0, 1
+        while True:
+            r1 = min(r0 + width - 1, max_ring)
+            members = self._points_in_cells(self._ring_cells(col, row, r0, r1))
+            if len(members):
+                found.append(members)
+                count += len(members)
+
+            if count >= k:
+                candidates = np.concatenate(found)
+                distances = self._distances(x, y, candidates)
+                kth = np.partition(distances, k - 1)[k - 1]
+                if kth <= self._covered_radius(x, y, col, row, r1) or r1 == max_ring:
+                    break
+            elif r1 == max_ring:
+                candidates = np.concatenate(found)
+                distances = self._distances(x, y, candidates)
+                break
+            r0, width = r1 + 1, width * 2
+
+        # Sortowanie tylko punktów nie dalszych niż k-ty (z remisami)
+        if len(candidates) > k:
+            keep = distances <= np.partition(distances, k - 1)[k - 1]
+            candidates, distances = candidates[keep], distances[keep]
+        ranked = np.lexsort((candidates, distances))[:k]
+        return candidates[ranked]
+
+    def nearest(self, x: float, y: float) -> int:
+        """Index of the nearest alive point, or -1 if the index is empty."""
+        found = self.nearest_k(x, y, 1)
+        return int(found[0]) if len(found) else -1
+
+    def radius(self, x: float, y: float, r: float) -> np.ndarray:
+        """Alive point indices within distance r (unordered)."""
+        col0, row0 = self._cell_coordinates(x - r, y - r)
+        col1, row1 = self._cell_coordinates(x + r, y + r)
+        candidates = self._points_in_cells(self._cells_in_block(col0, row0, col1, row1))
+        return candidates[self._distances(x, y, candidates) <= r]
+
+    def rectangle(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Alive point indices with x0 <= x <= x1 and y0 <= y <= y1 (unordered)."""
+        col0, row0 = self._cell_coordinates(x0, y0)
+        col1, row1 = self._cell_coordinates(x1, y1)
+        candidates = self._points_in_cells(self._cells_in_block(col0, row0, col1, row1))
+        xs, ys = self.x[candidates].astype(np.float64), self.y[candidates].astype(np.float64)
+        return candidates[(xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1)]
+
+    def cells_in_rectangle(self, col0: int, row0: int, col1: int, row1: int) -> np.ndarray:
+        """Ids of the grid cells in the (inclusive, clipped) block of columns and rows."""
+        return self._cells_in_block(col0, row0, col1, row1)
@@ -0,0 +1,74 @@
+import numpy as np
+
+
+class SummedAreaTable:
+    """
+    2D prefix sums (integral image) over a grid of counts.
+
+    `sum(row0, col0, row1, col1)` returns the total of an inclusive
+    rectangle in O(1). Point additions/removals are buffered as pending
+    cell deltas and added to the answer, so updates are O(1) as well;
+    once more than `rebuild_threshold` cells are pending, the table is
+    rebuilt. Vectorized queries (`sums`) rebuild first.
+    """
+
+    def __init__(self, grid: np.ndarray, rebuild_threshold: int = 64):
+        self.grid = np.array(grid, dtype=np.int64)
+        if self.grid.ndim != 2:
+            raise ValueError("grid must be 2D")
+        self.n_rows, self.n_cols = self.grid.shape
+        self.rebuild_threshold = rebuild_threshold
+        self._pending = {}
+        self.table = None
+        self.rebuild()
+
+    def rebuild(self):
+        """Folds the pending updates into the prefix sums."""
+        for (row, col), delta in self._pending.items():
+            self.grid[row, col] += delta
+        self._pending = {}
+
+        self.table = np.zeros((self.n_rows + 1, self.n_cols + 1), dtype=np.int64)
+        np.cumsum(np.cumsum(self.grid, axis=0), axis=1, out=self.table[1:, 1:])
+
+    def add(self, row: int, col: int, delta: int = 1):
+        """Adds `delta` points to cell (row, col)."""
+        key = (row, col)
+        self._pending[key] = self._pending.get(key, 0) + delta
+        if len(self._pending) > self.rebuild_threshold:
+            self.rebuild()
+
+    def remove(self, row: int, col: int, delta: int = 1):
+        """Removes `delta` points from cell (row, col)."""
+        self.add(row, col, -delta)
+
+    def _clip(self, row0: int, col0: int, row1: int, col1: int) -> tuple[int, int, int, int]:
+        return max(row0, 0), max(col0, 0), min(row1, self.n_rows - 1), min(col1, self.n_cols - 1)
+
+    def sum(self, row0: int, col0: int, row1: int, col1: int) -> int:
+        """Total of the cells row0..row1 x col0..col1 (inclusive, clipped to the grid)."""
+        row0, col0, row1, col1 = self._clip(row0, col0, row1, col1)
+        if row0 > row1 or col0 > col1:
+            return 0
+
+        t = self.table
+        total = t[row1 + 1, col1 + 1] - t[row0, col1 + 1] - t[row1 + 1, col0] + t[row0, col0]
+        for (row, col), delta in self._pending.items():
+            if row0 <= row <= row1 and col0 <= col <= col1:
+                total += delta
+        return int(total)
+
+    def sums(self, row0, col0, row1, col1) -> np.ndarray:
+        """Vectorized `sum` for arrays of inclusive rectangles (must lie inside the grid)."""
+        if self._pending:
+            self.rebuild()
+        row0, col0 = np.asarray(row0), np.asarray(col0)
+        row1, col1 = np.asarray(row1) + 1, np.asarray(col1) + 1
+        t = self.table
+        return t[row1, col1] - t[row0, col1] - t[row1, col0] + t[row0, col0]
+
+    def counts(self) -> np.ndarray:
+        """Current cell counts (including pending updates)."""
+        if self._pending:
+            self.rebuild()
+        return self.grid
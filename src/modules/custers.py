@@ -1,11 +1,69 @@
 from modules.common.point import Point
+from modules.common.point_set import PointSet
+from modules.common.spatial_index import GridIndex
+from modules.common.summed_area_table import SummedAreaTable
 from modules.common.path import Path
 
 from math import sqrt
 
-
-def create_clusters(points: list[Point], cluster_size: int, map_size: int) -> list[list[Point]]:
+import numpy as np
+
+
+class ClusterGrid:
+    """
+    Points bucketed into the square cluster grid, in CSR layout.
+
+    Cluster `c` (c = y * grid_size + x) holds the points
+    `point_indices[offsets[c]:offsets[c + 1]]`, and `counts[c]` is their
+    number. The grid behaves like the list of clusters returned by
+    create_clusters for plain point lists: `grid[c]` is a PointSet.
+    The layout comes from the shared GridIndex; `table` is a summed-area
+    table of the counts (rows = y, columns = x).
+    """
+
+    def __init__(self, points: PointSet, cluster_size: int, map_size: int, cluster_ids: np.ndarray = None):
+        self.points = points
+        self.cluster_size = cluster_size
+        self.grid_size = map_size // cluster_size
+        self.index = GridIndex(points.x, points.y, cell_size=cluster_size, origin=(0, 0),
+                               shape=(self.grid_size, self.grid_size), cells=cluster_ids)
+        self.offsets = self.index.offsets
+        self.point_indices = self.index.order
+        self.counts = np.diff(self.offsets)
+        self.table = SummedAreaTable(self.counts.reshape(self.grid_size, self.grid_size))
+
+    def __len__(self) -> int:
+        return self.grid_size * self.grid_size
+
+    def __getitem__(self, cluster_id: int) -> PointSet:
+        return self.points.take(self.point_indices[self.offsets[cluster_id]:self.offsets[cluster_id + 1]])
+
+    def __iter__(self):
+        for cluster_id in range(len(self)):
+            yield self[cluster_id]
+
+    def points_in(self, cluster_ids) -> PointSet:
+        """All points of the given clusters, in cluster order."""
+        cluster_ids = np.unique(np.asarray(cluster_ids, dtype=np.int64))
+        parts = [self.point_indices[self.offsets[c]:self.offsets[c + 1]] for c in cluster_ids]
+        return self.points.take(np.concatenate(parts) if parts else np.empty(0, dtype=np.intp))
+
+
+def create_clusters(points: list[Point] | PointSet, cluster_size: int, map_size: int,
+                    cluster_ids: np.ndarray = None) -> list[list[Point]] | ClusterGrid:
+    """
+    Groups the points into a grid of clusters. For a PointSet a ClusterGrid
+    is returned; `cluster_ids` may hold precomputed ids (see Map.load_binary).
+    """
     clusters_count = map_size // cluster_size * map_size // cluster_size
+
+    if isinstance(points, PointSet):
+        grid = ClusterGrid(points, cluster_size, map_size, cluster_ids)
+        for i in grid.index.outside:
+            x, y = points.x[i] // cluster_size, points.y[i] // cluster_size
+            print(f"[IndexError] x: {x} y: {y}\tCluster id: {y * grid.grid_size + x}")
+        return grid
+
     clusters = [[] for _ in range(clusters_count)]
 
     for point in points:
@@ -20,12 +78,23 @@ def create_clusters(points: list[Point], cluster_size: int, map_size: int) -> li
     return clusters
 
 
-def get_cluster_ids_in_square_between_points(clusters: list[list[Point]], 
+def get_cluster_ids_in_square_between_points(clusters: list[list[Point]] | ClusterGrid, 
                                              p1: Point, p2: Point, 
                                              cluster_size: int, map_size: int,
                                              k: int) -> list[int]:
+    """
+    Ids of the non-empty clusters in the smallest rectangle around p1 and p2,
+    grown by the same number of clusters on every side, holding at least
+    k points. The growth is found by binary search over a summed-area table.
+    """
     grid_size = map_size // cluster_size
 
+    if isinstance(clusters, ClusterGrid):
+        table = clusters.table
+    else:
+        counts = np.array([len(cluster) for cluster in clusters], dtype=np.int64)
+        table = SummedAreaTable(counts.reshape(grid_size, grid_size))
+
     # Get grid coordinates for p1 and p2
     x1, y1 = p1.x // cluster_size, p1.y // cluster_size
     x2, y2 = p2.x // cluster_size, p2.y // cluster_size
@@ -33,37 +102,33 @@ def get_cluster_ids_in_square_between_points(clusters: list[list[Point]],
     min_x, max_x = min(x1, x2), max(x1, x2)
     min_y, max_y = min(y1, y2), max(y1, y2)
 
-    cluster_ids = []
-
-    while True:
-        for y in range(min_y, max_y + 1):
-            for x in range(min_x, max_x + 1):
-                if x >= grid_size or y >= grid_size:
-                    continue  # skip out-of-bounds
-
-                cluster_id = y * grid_size + x
-                if clusters[cluster_id]:  # not empty
-                    cluster_ids.append(cluster_id)
+    def points_within(r: int) -> int:
+        return table.sum(min_y - r, min_x - r, max_y + r, max_x + r)
 
-        if len(get_all_points_in_clusters(get_clusters_from_ids(clusters, cluster_ids))) >= k:
-            break
-        min_x -= 1
-        min_y -= 1
-        max_x += 1
-        max_y += 1
+    # Najmniejsze r, dla którego prostokąt ma k punktów (albo pokrywa całą siatkę)
+    low = 0
+    high = max(min_x, min_y, grid_size - 1 - max_x, grid_size - 1 - max_y, 0)
+    while low < high:
+        middle = (low + high) // 2
+        if points_within(middle) >= k:
+            high = middle
+        else:
+            low = middle + 1
 
-    return cluster_ids
+    xs = np.arange(max(min_x - low, 0), min(max_x + low, grid_size - 1) + 1)
+    ys = np.arange(max(min_y - low, 0), min(max_y + low, grid_size - 1) + 1)
+    cluster_ids = (ys[:, None] * grid_size + xs[None, :]).ravel()
+    return cluster_ids[table.counts().ravel()[cluster_ids] > 0].tolist()
 
 
+def get_clusters_from_ids(clusters: list[list[Point]] | ClusterGrid, ids: list[int]) -> list[list[Point]] | list[PointSet]:
+    """Clusters with the given ids, in cluster id order."""
+    return [clusters[i] for i in sorted(set(ids))]
 
-def get_clusters_from_ids(clusters: list[list[Point]], ids: list[int]) -> list[list[Point]]:
-    temp = []
-    for i, cluster in enumerate(clusters):
-        if i in ids:
-            temp.append(cluster)
-    return temp
+def get_all_points_in_clusters(clusters: list[list[Point]] | list[PointSet]) -> list[Point] | PointSet:
+    if clusters and all(isinstance(cluster, PointSet) for cluster in clusters):
+        return PointSet.concatenate(clusters)
 
-def get_all_points_in_clusters(clusters: list[list[Point]]) -> list[Point]:
     points = []
     for cluster in clusters:
         for point in cluster:
@@ -71,13 +136,16 @@ def get_all_points_in_clusters(clusters: list[list[Point]]) -> list[Point]:
     return points
     
 
-def run(points: list[Point], start_point: Point, end_point: Point, cluster_size: int = 100, map_size: int = 5000, k: int = 100
-        ) -> tuple[list[list[Point]], list[int]]:
-    clusters = create_clusters(points, cluster_size, map_size)
+def run(points: list[Point] | PointSet, start_point: Point, end_point: Point, cluster_size: int = 100, map_size: int = 5000, k: int = 100,
+        cluster_ids: np.ndarray = None) -> tuple[list[list[Point]] | ClusterGrid, list[int]]:
+    clusters = create_clusters(points, cluster_size, map_size, cluster_ids)
     selected_clusters = get_cluster_ids_in_square_between_points(clusters, start_point, end_point, cluster_size, map_size, k)
-    points = get_all_points_in_clusters(get_clusters_from_ids(clusters, selected_clusters))
+    if isinstance(clusters, ClusterGrid):
+        points_count = int(clusters.counts[selected_clusters].sum())
+    else:
+        points_count = len(get_all_points_in_clusters(get_clusters_from_ids(clusters, selected_clusters)))
 
     print(f"\nCreated {len(clusters)} clusters with size of {cluster_size}")
     print(f"Selected {len(selected_clusters)} clusters")
-    print(f"Points in selected clusters: {len(points)}")
+    print(f"Points in selected clusters: {points_count}")
     return clusters, selected_clusters
\ No newline at end of file
@@ -1,6 +1,13 @@
+import argparse
+import contextlib
+import csv
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
+
+from modules.common.spatial_index import GridIndex
 
 # Parametry symulacji
 AREA_SIZE = 50  # m
@@ -18,6 +25,10 @@ OBJECTS_COUNT = {
     'kamyk': 200
 }
 
+# Typy obiektów i ich kody w tablicach
+OBJECT_TYPES = list(OBJECTS_COUNT)
+TYPE_CODES = {obj_type: code for code, obj_type in enumerate(OBJECT_TYPES)}
+
 # Czas polowania (s)
 HUNTING_TIME = {
     'mysz_polna': 180,
@@ -49,123 +60,287 @@ OBJECT_COLORS = {
     'kamyk': 'black'
 }
 
+CATS = ['Ariana', 'Luna', 'Dante']
+
 CAT_COLORS = {
     'Ariana': 'red',
     'Luna': 'blue',
     'Dante': 'purple'
 }
 
+# Generowanie obiektów jako tablic
+def generate_object_arrays(rng=None, counts=None, area_size=AREA_SIZE) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Random positions (n, 2) and type codes of all objects. Without `rng`
+    the global np.random state is used, with the same draws as before;
+    otherwise `rng` is a seed or a np.random.Generator.
+    """
+    counts = OBJECTS_COUNT if counts is None else counts
+    random = np.random if rng is None else np.random.default_rng(rng)
+    # Losowanie (x, y) obiekt po obiekcie - ta sama kolejność co w pojedynczych wywołaniach
+    positions = [random.uniform(0, area_size, (count, 2)) for count in counts.values()]
+    types = [np.full(count, TYPE_CODES[obj_type], dtype=np.int64) for obj_type, count in counts.items()]
+    return np.concatenate(positions), np.concatenate(types)
+
 # Generowanie obiektów
-def generate_objects():
-    objects = []
-    for obj_type, count in OBJECTS_COUNT.items():
-        for _ in range(count):
-            x = np.random.uniform(0, AREA_SIZE)
-            y = np.random.uniform(0, AREA_SIZE)
-            objects.append({'type': obj_type, 'position': (x, y)})
-    return objects
+def generate_objects(rng=None):
+    positions, types = generate_object_arrays(rng)
+    return [{'type': OBJECT_TYPES[t], 'position': (x, y)}
+            for (x, y), t in zip(positions.tolist(), types.tolist())]
 
 # Odległość euklidesowa
 def distance(p1, p2):
     return np.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
 
-# Symulacja polowania dla jednego kota
-def simulate_hunt(cat, available_objects):
-    current_pos = HOME
-    carried_objects = 0
-    time_used = 0
-    path = [HOME]
-    collected = []
-    
-    while time_used < MAX_TIME:
-        # Filtruj obiekty o dodatniej wartości dla kota
-        candidates = [obj for obj in available_objects if VALUES[cat][obj['type']] > 0]
-        if not candidates:
-            break
-            
-        # Oblicz odległości i posortuj (optymalizacja: 50 najbliższych)
-        candidates_with_dist = [(obj, distance(current_pos, obj['position'])) for obj in candidates]
-        candidates_with_dist.sort(key=lambda x: x[1])
-        candidates_subset = candidates_with_dist[:50]
-        
-        best_obj = None
-        best_ratio = -np.inf
-        return_home = False
-        
-        for obj, dist in candidates_subset:
-            # Czas dojścia do obiektu
-            time_to_obj = dist / VELOCITY
-            # Czas polowania
-            hunt_time = HUNTING_TIME[obj['type']]
-            # Jeśli po zebraniu kot będzie miał 5 obiektów, dodaj czas powrotu do domu
-            if carried_objects + 1 == MAX_OBJECTS:
-                time_to_home = distance(obj['position'], HOME) / VELOCITY
-                total_time = time_to_obj + hunt_time + time_to_home
-            else:
-                total_time = time_to_obj + hunt_time
-            
-            # Sprawdź, czy starczy czasu
-            if time_used + total_time > MAX_TIME:
-                continue
-                
-            # Wartość na jednostkę czasu
-            value = VALUES[cat][obj['type']]
-            ratio = value / total_time
-            
-            if ratio > best_ratio:
-                best_ratio = ratio
-                best_obj = obj
-                best_total_time = total_time
-                return_home = (carried_objects + 1 == MAX_OBJECTS)
-        
-        if best_obj is None:
-            break
-            
-        # Zbierz obiekt
-        time_used += best_total_time
-        collected.append(best_obj)
-        available_objects.remove(best_obj)
-        carried_objects += 1
-        path.append(best_obj['position'])
-        
+# Obiekty jako tablice: pozycje (n, 2) i kody typów (indeksy w OBJECT_TYPES)
+def objects_to_arrays(objects) -> tuple[np.ndarray, np.ndarray]:
+    positions = np.array([obj['position'] for obj in objects], dtype=np.float64).reshape(-1, 2)
+    types = np.array([TYPE_CODES[obj['type']] for obj in objects], dtype=np.int64)
+    return positions, types
+
+# Stan jednego polującego kota na wspólnych tablicach obiektów
+class Hunter:
+    """
+    One cat hunting over objects given as arrays. `alive` marks the objects
+    still available and is shared by all hunters; collected objects are
+    cleared in it. Objects with a positive value for the cat are kept in
+    a GridIndex, and every pick scores the 50 nearest of them at once.
+    Objects taken by other cats are dropped with `forget`.
+    """
+
+    def __init__(self, cat, positions, types, alive, max_time=MAX_TIME, home=HOME, values=None):
+        self.cat = cat
+        self.alive = alive
+        self.max_time = max_time
+        self.home = home
+
+        values = VALUES[cat] if values is None else values
+        object_values = np.array([values[t] for t in OBJECT_TYPES], dtype=np.float64)[types]
+        hunt_times = np.array([HUNTING_TIME[t] for t in OBJECT_TYPES], dtype=np.float64)[types]
+
+        self.candidates = np.flatnonzero(alive & (object_values > 0))
+        self.xs, self.ys = positions[self.candidates, 0], positions[self.candidates, 1]
+        self.values, self.hunt_times = object_values[self.candidates], hunt_times[self.candidates]
+        # Czas powrotu do domu od każdego obiektu
+        self.home_times = np.sqrt((self.xs - home[0])**2 + (self.ys - home[1])**2) / VELOCITY
+        self.index = GridIndex(self.xs, self.ys)
+        # Pozycja obiektu w indeksie tego kota (-1, jeśli nie jest dla niego kandydatem)
+        self.local = np.full(len(types), -1, dtype=np.int64)
+        self.local[self.candidates] = np.arange(len(self.candidates))
+
+        self.current_pos = home
+        self.carried_objects = 0
+        self.time_used = 0
+        self.path = [home]
+        self.collected = []
+
+    def choose(self):
+        """
+        Best next object (position in the candidate arrays) with its total
+        time (walk, hunt and, for the 5th object, the way home), or None.
+        """
+        if len(self.index) == 0:
+            return None
+
+        # 50 najbliższych obiektów (remisy w kolejności tablic)
+        x, y = self.current_pos
+        nearest = self.index.nearest_k(x, y, 50)
+        dist = np.sqrt((x - self.xs[nearest])**2 + (y - self.ys[nearest])**2)
+        total_times = dist / VELOCITY + self.hunt_times[nearest]
+        # Jeśli po zebraniu kot będzie miał 5 obiektów, dodaj czas powrotu do domu
+        if self.carried_objects + 1 == MAX_OBJECTS:
+            total_times = total_times + self.home_times[nearest]
+
+        # Wartość na jednostkę czasu; pierwszy najlepszy z obiektów, na które starczy czasu
+        feasible = ~(self.time_used + total_times > self.max_time)
+        if not feasible.any():
+            return None
+        ratios = np.where(feasible, self.values[nearest] / total_times, -np.inf)
+        best = int(np.argmax(ratios))
+        return int(nearest[best]), total_times[best]
+
+    def collect(self, i, total_time) -> int:
+        """Takes candidate `i`; returns the object's index in the shared arrays."""
+        obj = int(self.candidates[i])
+        self.time_used += total_time
+        self.collected.append(obj)
+        self.alive[obj] = False
+        self.index.remove(i)
+        self.carried_objects += 1
+        position = (float(self.xs[i]), float(self.ys[i]))
+        self.path.append(position)
+
         # Wróć do domu po 5. obiekt
-        if return_home:
-            path.append(HOME)
-            current_pos = HOME
-            carried_objects = 0
+        if self.carried_objects == MAX_OBJECTS:
+            self.path.append(self.home)
+            self.current_pos = self.home
+            self.carried_objects = 0
         else:
-            current_pos = best_obj['position']
-    
+            self.current_pos = position
+        return obj
+
+    def forget(self, obj: int):
+        """Drops an object taken by another cat."""
+        i = self.local[obj]
+        if i >= 0:
+            self.index.remove(int(i))
+
+    def result(self) -> dict:
+        return {
+            'collected': self.collected,
+            'path': self.path,
+            'time_used': self.time_used
+        }
+
+# Symulacja polowania dla jednego kota na tablicach obiektów
+def simulate_hunt_arrays(cat, positions, types, alive, max_time=MAX_TIME, home=HOME):
+    """
+    Hunt of one cat; `alive` is updated in place, so cats can hunt one
+    after another on the same mask. Returns the collected object indices,
+    the path and the time used.
+    """
+    hunter = Hunter(cat, positions, types, alive, max_time, home)
+    while hunter.time_used < max_time:
+        choice = hunter.choose()
+        if choice is None:
+            break
+        hunter.collect(*choice)
+    return hunter.result()
+
+# Równoczesne polowanie wielu kotów na wspólnym zegarze
+def simulate_concurrent(cats, positions, types, alive, max_time=MAX_TIME, home=HOME, values=None):
+    """
+    All cats hunt at the same time. A queue of events ordered by time
+    (ties: order of `cats`) decides who acts next; the acting cat picks
+    its object as in the single-cat hunt and claims it at once, so the
+    object disappears from every other cat's index (O(1) removal) and
+    the cat's next event is scheduled when it is done with it.
+
+    `values` optionally maps cat names to their value tables (default
+    VALUES), so any number of agents can take part. Returns the results
+    per cat.
+    """
+    values = VALUES if values is None else values
+    hunters = [Hunter(cat, positions, types, alive, max_time, home, values[cat]) for cat in cats]
+
+    events = [(0, order) for order in range(len(hunters))]
+    heapq.heapify(events)
+    while events:
+        _, order = heapq.heappop(events)
+        hunter = hunters[order]
+        if hunter.time_used >= max_time:
+            continue
+        choice = hunter.choose()
+        if choice is None:
+            continue
+
+        obj = hunter.collect(*choice)
+        for other in hunters:
+            if other is not hunter:
+                other.forget(obj)
+        heapq.heappush(events, (hunter.time_used, order))
+
+    return {hunter.cat: hunter.result() for hunter in hunters}
+
+# Symulacja polowania dla jednego kota (obiekty jako lista słowników)
+def simulate_hunt(cat, available_objects):
+    positions, types = objects_to_arrays(available_objects)
+    alive = np.ones(len(available_objects), dtype=bool)
+    result = simulate_hunt_arrays(cat, positions, types, alive)
+
+    collected = [available_objects[i] for i in result['collected']]
+    # Zebrane obiekty znikają z listy (kolejność pozostałych bez zmian)
+    available_objects[:] = [obj for obj, keep in zip(available_objects, alive.tolist()) if keep]
     return {
         'collected': collected,
-        'path': path,
-        'time_used': time_used
+        'path': result['path'],
+        'time_used': result['time_used']
     }
 
-# Główna symulacja
-def main():
-    # Inicjalizacja
-    all_objects = generate_objects()
-    cats = ['Ariana', 'Luna', 'Dante']
-    results = {}
-    available_objects = all_objects.copy()
-    
-    # Symuluj polowanie dla każdego kota
-    for cat in cats:
-        results[cat] = simulate_hunt(cat, available_objects)
-        print(f"{cat}: zebrano {len(results[cat]['collected'])} obiektów, czas: {results[cat]['time_used']} s")
-    
-    # Wizualizacja
+# Wartość zebranych obiektów dla kota
+def collected_value(cat, types, collected) -> int:
+    return int(sum(VALUES[cat][OBJECT_TYPES[t]] for t in types[collected].tolist()))
+
+# Jeden świat: koty polują po kolei (albo równocześnie) na wspólnych obiektach
+def run_world(seed=None, max_time=MAX_TIME, cats=CATS, concurrent=False):
+    positions, types = generate_object_arrays(seed)
+    alive = np.ones(len(types), dtype=bool)
+    if concurrent:
+        results = simulate_concurrent(cats, positions, types, alive, max_time=max_time)
+    else:
+        results = {cat: simulate_hunt_arrays(cat, positions, types, alive, max_time=max_time) for cat in cats}
+    return positions, types, alive, results
+
+def _world_rows(seed, max_time, concurrent=False):
+    """Per-cat result rows of one batch world (only plain values cross the process boundary)."""
+    _, types, _, results = run_world(seed, max_time, concurrent=concurrent)
+    return [(seed, cat, len(result['collected']), collected_value(cat, types, result['collected']),
+             float(result['time_used']))
+            for cat, result in results.items()]
+
+BATCH_COLUMNS = ('seed', 'cat', 'collected', 'value', 'time_used')
+
+def run_batch(seeds, workers=None, output=None, max_time=MAX_TIME, concurrent=False):
+    """
+    Runs one independently seeded world per seed on a process pool.
+    Rows (seed, cat, collected, value, time_used) are streamed to the CSV
+    file `output` (if given) in seed order as the worlds finish, and the
+    per-cat aggregates (mean, std, min, max of each column) are returned.
+    With `concurrent` the cats of each world hunt at the same time.
+    """
+    seeds = list(seeds)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(seeds) // (workers * 4))
+    columns = {cat: {name: [] for name in BATCH_COLUMNS[2:]} for cat in CATS}
+
+    with contextlib.ExitStack() as stack:
+        writer = None
+        if output is not None:
+            writer = csv.writer(stack.enter_context(open(output, 'w', newline='')))
+            writer.writerow(BATCH_COLUMNS)
+
+        if workers == 1:
+            worlds = (_world_rows(seed, max_time, concurrent) for seed in seeds)
+        else:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            worlds = executor.map(_world_rows, seeds, [max_time] * len(seeds), [concurrent] * len(seeds),
+                                  chunksize=chunksize)
+
+        for rows in worlds:
+            if writer is not None:
+                writer.writerows(rows)
+            for _, cat, *values in rows:
+                for name, value in zip(BATCH_COLUMNS[2:], values):
+                    columns[cat][name].append(value)
+
+    stats = {'worlds': len(seeds)}
+    for cat, cat_columns in columns.items():
+        stats[cat] = {}
+        for name, values in cat_columns.items():
+            values = np.array(values, dtype=np.float64)
+            stats[cat][name] = {
+                'mean': float(values.mean()) if len(values) else float('nan'),
+                'std': float(values.std()) if len(values) else float('nan'),
+                'min': float(values.min()) if len(values) else float('nan'),
+                'max': float(values.max()) if len(values) else float('nan'),
+            }
+    return stats
+
+# Wizualizacja
+def plot_hunt(positions, types, alive, results, filename='hunting_paths.png'):
+    import matplotlib.pyplot as plt
+    from matplotlib.lines import Line2D
+
     plt.figure(figsize=(12, 12))
     
-    # Rysuj pozostałe obiekty
-    for obj in available_objects:
-        x, y = obj['position']
-        plt.scatter(x, y, color=OBJECT_COLORS[obj['type']], s=20, alpha=0.7)
+    # Rysuj pozostałe obiekty (jedno wywołanie na typ)
+    for code, obj_type in enumerate(OBJECT_TYPES):
+        left = positions[alive & (types == code)]
+        plt.scatter(left[:, 0], left[:, 1], color=OBJECT_COLORS[obj_type], s=20, alpha=0.7)
     
     # Rysuj trasy kotów
-    for cat in cats:
-        path = results[cat]['path']
+    for cat, result in results.items():
+        path = result['path']
         x, y = zip(*path)
         plt.plot(x, y, color=CAT_COLORS[cat], linewidth=2, marker='o', markersize=4, label=cat)
         plt.scatter(x[0], y[0], color='black', s=200, zorder=5)  # dom
@@ -185,8 +360,39 @@ def main():
     plt.xlim(0, AREA_SIZE)
     plt.ylim(0, AREA_SIZE)
     plt.grid(alpha=0.3)
-    plt.savefig('hunting_paths.png')
+    plt.savefig(filename)
     plt.show()
 
+# Główna symulacja
+def main():
+    parser = argparse.ArgumentParser(description="Symulacja polowań kotów")
+    parser.add_argument('--batch', type=int, default=0, help="liczba losowych światów (bez wykresu)")
+    parser.add_argument('--seed', type=int, default=None, help="ziarno (pierwsze ziarno w trybie wsadowym)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=None, help="plik CSV z wynikami trybu wsadowego")
+    parser.add_argument('--max-time', type=float, default=MAX_TIME)
+    parser.add_argument('--concurrent', action='store_true', help="koty polują równocześnie (wspólny zegar)")
+    args = parser.parse_args()
+
+    if args.batch:
+        first = args.seed or 0
+        stats = run_batch(range(first, first + args.batch), workers=args.workers,
+                          output=args.output, max_time=args.max_time, concurrent=args.concurrent)
+        print(f"Światy: {stats['worlds']}")
+        for cat in CATS:
+            s = stats[cat]
+            print(f"{cat}: obiekty {s['collected']['mean']:.1f} ± {s['collected']['std']:.1f}, "
+                  f"wartość {s['value']['mean']:.1f} ± {s['value']['std']:.1f} "
+                  f"(min {s['value']['min']:.0f}, max {s['value']['max']:.0f}), "
+                  f"czas {s['time_used']['mean']:.0f} s")
+        return
+
+    # Bez ziarna - globalny stan np.random, jak dotąd
+    positions, types, alive, results = run_world(args.seed, args.max_time, concurrent=args.concurrent)
+    for cat, result in results.items():
+        print(f"{cat}: zebrano {len(result['collected'])} obiektów, czas: {result['time_used']} s")
+
+    plot_hunt(positions, types, alive, results)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,369 @@
+import ctypes
+import pathlib
+import platform
+
+import numpy as np
+
+USE_C_IMPLEMENTATION = True
+
+_longlong_p = ctypes.POINTER(ctypes.c_longlong)
+
+try:
+    if USE_C_IMPLEMENTATION:
+        current_dir = pathlib.Path(__file__).parent.resolve()
+        lib_path = str(current_dir / 'c_modules' / ('knapsack.dll' if platform.system() == "Windows" else 'knapsack.so'))
+
+        knapsack_lib = ctypes.CDLL(lib_path)
+        knapsack_lib.knapsack_unbounded_pass.argtypes = [_longlong_p, ctypes.POINTER(ctypes.c_int), ctypes.c_longlong,
+                                                         ctypes.c_longlong, ctypes.c_longlong, ctypes.c_int]
+        knapsack_lib.knapsack_unbounded_pass.restype = None
+        knapsack_lib.knapsack_unbounded_pass_short.argtypes = [_longlong_p, ctypes.POINTER(ctypes.c_short), ctypes.c_longlong,
+                                                               ctypes.c_longlong, ctypes.c_longlong, ctypes.c_int]
+        knapsack_lib.knapsack_unbounded_pass_short.restype = None
+        knapsack_lib.knapsack_binary_pass.argtypes = [_longlong_p, ctypes.POINTER(ctypes.c_ubyte), ctypes.c_longlong,
+                                                      ctypes.c_longlong, ctypes.c_longlong]
+        knapsack_lib.knapsack_binary_pass.restype = None
+        print(f"Successfully loaded C knapsack library: {lib_path}")
+except Exception as e:
+    print(f"Error loading C knapsack library: {e}")
+    USE_C_IMPLEMENTATION = False
+
+# Wartość stanów nieosiągalnych w DP na liczbach całkowitych. Sumy wartości są
+# mniejsze niż 2^59, więc stan wyprowadzony ze stanu nieosiągalnego zostaje poniżej
+# _UNREACHABLE // 2 i nie trzeba go przycinać
+_UNREACHABLE = np.iinfo(np.int64).min // 4
+
+# Powyżej tylu bajtów tablic rekonstrukcji (rodzice / bity decyzji) solver
+# przechodzi w tryb oszczędny (low_memory)
+RECONSTRUCTION_BYTES_LIMIT = 1 << 28
+# Liczba stanów jednego wiersza przetwarzana naraz w przejściu NumPy przedmiotu nieograniczonego
+_CHUNK_STATES = 1 << 20
+# Bity decyzji poniżej tego rozmiaru rekonstruują kawałki bezpośrednio, bez dalszego dzielenia
+_LEAF_BYTES = 1 << 22
+
+
+def _integer_values(values: np.ndarray, limit: float) -> tuple[np.ndarray, int] | tuple[None, None]:
+    """
+    Values scaled to exact integers (by 10^d, d <= 6) if they have few
+    enough decimals and no DP sum can get near `limit`; otherwise (None, None).
+    """
+    for digits in range(7):
+        scale = 10 ** digits
+        scaled = values * scale
+        rounded = np.round(scaled)
+        if np.all(np.abs(scaled - rounded) < 1e-6):
+            if np.abs(rounded).max(initial=0) * limit >= 2.0 ** 59:
+                return None, None
+            return rounded.astype(np.int64), scale
+    return None, None
+
+
+def _unbounded_pass(dp: np.ndarray, volume: int, value: np.ndarray,
+                    parent: np.ndarray | None = None, item: int = -1) -> None:
+    """
+    Adds an unbounded item to `dp` in place, for all rows (cats) at once.
+    Along every residue class mod `volume`:
+        candidate[t] = max_{s < t} (dp[s] + (t - s) * value)
+                     = t * value + max_{s < t} (dp[s] - s * value),
+    i.e. a running maximum over the (T, volume) reshape of the row. It is
+    done in chunks of steps, carrying the maximum of the earlier chunks,
+    so the extra memory does not grow with the capacity. Improved states
+    get `item` in `parent`.
+    """
+    n_rows, length = dp.shape
+    steps = -(-length // volume)
+    block = max(1, _CHUNK_STATES // volume)
+    unreachable = _UNREACHABLE if dp.dtype.kind == 'i' else -np.inf
+    carry = np.full((n_rows, 1, volume), unreachable, dtype=dp.dtype)
+
+    for start in range(0, steps, block):
+        stop = min(steps, start + block)
+        lo, hi = start * volume, min(length, stop * volume)
+        padded = np.full((n_rows, (stop - start) * volume), unreachable, dtype=dp.dtype)
+        padded[:, :hi - lo] = dp[:, lo:hi]
+        padded = padded.reshape(n_rows, stop - start, volume)
+
+        shift = np.arange(start, stop, dtype=dp.dtype)[None, :, None] * value[:, None, None]
+        padded -= shift
+        np.maximum.accumulate(padded, axis=1, out=padded)
+        candidate = np.empty_like(padded)
+        candidate[:, :1] = carry
+        np.maximum(padded[:, :-1], carry, out=candidate[:, 1:])
+        np.maximum(carry, padded[:, -1:], out=carry)
+        candidate += shift
+        candidate = candidate.reshape(n_rows, -1)[:, :hi - lo]
+
+        window = dp[:, lo:hi]
+        if parent is not None:
+            parent[:, lo:hi][candidate > window] = item
+        np.maximum(window, candidate, out=window)
+
+
+def _native_unbounded_pass(dp: np.ndarray, volume: int, value: np.ndarray,
+                           parent: np.ndarray | None = None, item: int = -1) -> None:
+    """_unbounded_pass on int64 rows by the C kernel (int16 or int32 parents)."""
+    if parent is not None and parent.dtype == np.int16:
+        kernel, pointer = knapsack_lib.knapsack_unbounded_pass_short, ctypes.POINTER(ctypes.c_short)
+    else:
+        kernel, pointer = knapsack_lib.knapsack_unbounded_pass, ctypes.POINTER(ctypes.c_int)
+    for row in range(dp.shape[0]):
+        kernel(dp[row].ctypes.data_as(_longlong_p), None if parent is None else parent[row].ctypes.data_as(pointer),
+               dp.shape[1], volume, int(value[row]), item)
+
+
+def _add_piece(dp: np.ndarray, weight: int, gain: np.ndarray, native: bool, keep_bits: bool) -> np.ndarray | None:
+    """
+    Adds one 0/1 piece to `dp` in place (all rows). With `keep_bits`,
+    returns its decisions as packed bits: bit j - weight of a row is set
+    if the piece was taken at volume j.
+    """
+    n_rows, length = dp.shape
+    if weight >= length:
+        return np.zeros((n_rows, 0), dtype=np.uint8) if keep_bits else None
+
+    if native:
+        bits = np.zeros((n_rows, (length - weight + 7) // 8), dtype=np.uint8) if keep_bits else None
+        for row in range(n_rows):
+            knapsack_lib.knapsack_binary_pass(
+                dp[row].ctypes.data_as(_longlong_p),
+                None if bits is None else bits[row].ctypes.data_as(ctypes.POINTER(ctypes.c_ubyte)),
+                length, weight, int(gain[row])
+            )
+        return bits
+
+    candidate = dp[:, :length - weight] + gain[:, None]
+    if not keep_bits:
+        np.maximum(dp[:, weight:], candidate, out=dp[:, weight:])
+        return None
+    taken = candidate > dp[:, weight:]
+    dp[:, weight:] = np.where(taken, candidate, dp[:, weight:])
+    return np.packbits(taken, axis=1)
+
+
+def _empty_dp(n_rows: int, length: int, dtype) -> np.ndarray:
+    """DP rows with only volume 0 reachable."""
+    dp = np.full((n_rows, length), _UNREACHABLE if np.dtype(dtype).kind == 'i' else -np.inf, dtype=dtype)
+    dp[:, 0] = 0
+    return dp
+
+
+def _forward_pieces(weights: np.ndarray, gains: np.ndarray, length: int,
+                    native: bool, keep_bits: bool = False) -> tuple[np.ndarray, list]:
+    """DP over 0/1 pieces (gains: rows x pieces) and their packed decision bits, if kept."""
+    dp = _empty_dp(gains.shape[0], length, gains.dtype)
+    bits = [_add_piece(dp, int(weights[k]), gains[:, k], native, keep_bits) for k in range(len(weights))]
+    return dp, bits
+
+
+def _backtrack_bits(weights: np.ndarray, bits: list, row: int, j: int) -> list[int]:
+    """Pieces taken (indices) to reach volume `j` of `row`, read back from decision bits."""
+    taken = []
+    for k in range(len(weights) - 1, -1, -1):
+        weight = int(weights[k])
+        if j >= weight and (bits[k][row, (j - weight) >> 3] >> (7 - ((j - weight) & 7))) & 1:
+            taken.append(k)
+            j -= weight
+    return taken
+
+
+def _split_pieces(weights: np.ndarray, gains: np.ndarray, target: int, native: bool) -> list[int]:
+    """
+    Pieces taken (indices) in a best packing of volume exactly `target`
+    (gains of one row). Hirschberg-style: the DP of both halves of the
+    pieces gives the best split of the volume, and each half is solved
+    again on its part, so only O(target) DP values are alive at a time
+    instead of bits for every piece and volume.
+    """
+    n_pieces = len(weights)
+    if target == 0 or n_pieces == 0:
+        return []
+    if n_pieces == 1:
+        return [0]
+    if n_pieces * (target + 1) <= 8 * _LEAF_BYTES:
+        _, bits = _forward_pieces(weights, gains[None], target + 1, native, keep_bits=True)
+        return _backtrack_bits(weights, bits, 0, target)
+
+    mid = n_pieces // 2
+    left, _ = _forward_pieces(weights[:mid], gains[None, :mid], target + 1, native)
+    right, _ = _forward_pieces(weights[mid:], gains[None, mid:], target + 1, native)
+    left[0] += right[0, ::-1]
+    del right
+    split = int(np.argmax(left[0]))
+    del left
+
+    return (_split_pieces(weights[:mid], gains[:mid], split, native)
+            + [mid + k for k in _split_pieces(weights[mid:], gains[mid:], target - split, native)])
+
+
+def _leading_run(chain: np.ndarray, step) -> int:
+    """
+    Number of leading steps k of `chain` with step(chain[k], chain[k + 1])
+    true, checked in growing blocks (chain is a strided view).
+    """
+    run, size = 0, 64
+    while run + 1 < len(chain):
+        part = chain[run:run + size + 1]
+        failed = np.flatnonzero(~step(part[:-1], part[1:]))
+        if len(failed):
+            return run + int(failed[0])
+        run += len(part) - 1
+        size = min(size * 2, _CHUNK_STATES)
+    return run
+
+
+def _walk_parents(parent_row: np.ndarray, volumes: np.ndarray, counts_row: np.ndarray, j: int) -> None:
+    """Item counts read back from the last improving item of every volume."""
+    while j > 0 and parent_row[j] >= 0:
+        i = int(parent_row[j])
+        volume = int(volumes[i])
+        copies = max(1, _leading_run(parent_row[j::-volume], lambda a, b: a == i))
+        counts_row[i] += copies
+        j -= copies * volume
+
+
+def _walk_values(dp_row: np.ndarray, volumes: np.ndarray, values_row: np.ndarray,
+                 counts_row: np.ndarray, j: int) -> None:
+    """
+    Item counts read back from the final unbounded DP alone: a reachable
+    volume j > 0 has dp[j] = dp[j - v_i] + value_i for some item i.
+    Exact on int64; float64 takes the closest predecessor.
+    """
+    exact = dp_row.dtype.kind == 'i'
+    tolerance = 0 if exact else 1e-9 * max(1.0, abs(float(dp_row[j])))
+    # Nieosiągalne stany float to -inf: -inf - (-inf) daje NaN, które po prostu nie spełnia warunku
+    with np.errstate(invalid='ignore'):
+        while j > 0:
+            fits = np.flatnonzero(volumes <= j)
+            error = np.abs(dp_row[j] - (dp_row[j - volumes[fits]] + values_row[fits]))
+            i = int(fits[np.argmin(error)])
+            volume, value = int(volumes[i]), values_row[i]
+            copies = max(1, _leading_run(dp_row[j::-volume], lambda a, b: np.abs(a - b - value) <= tolerance))
+            counts_row[i] += copies
+            j -= copies * volume
+
+
+def _binary_pieces(bound: int) -> list[int]:
+    """Multiplicities 1, 2, 4, ..., rest summing to `bound` (binary splitting)."""
+    pieces = []
+    size = 1
+    while bound > 0:
+        take = min(size, bound)
+        pieces.append(take)
+        bound -= take
+        size *= 2
+    return pieces
+
+
+def solve_knapsack(volumes, values, capacity: int, bounds=None, low_memory: bool | None = None) -> dict:
+    """
+    Knapsack over integer `volumes` with total volume at most `capacity`.
+
+    `values` is (n_items,) or (n_cats, n_items); all cats share the
+    capacity axis and are solved together, one vectorized DP row per cat.
+    `bounds` limits the count of each item: None is unbounded, 1 gives
+    the 0/1 problem, an array gives per-item limits.
+
+    Returns a dict with `counts` (item counts, same leading shape as
+    `values`), `value` and `volume` of the best packing; of several best
+    packings, the one with the smallest volume is taken.
+
+    Values with up to 6 decimals are solved exactly on int64 (by the C
+    kernel from c_modules/knapsack.c when it is available); others on
+    float64. In NumPy, unbounded items run as a running maximum per
+    residue class of their volume. The last improving item is stored per
+    volume (int16 parents up to 32767 items) for the reconstruction.
+    Bounded items are split into binary pieces solved as 0/1 items, whose
+    decisions are kept as packed bits. Volumes and capacity are first
+    divided by the GCD of the volumes.
+
+    `low_memory` (by default: when the parents / bits would take more
+    than RECONSTRUCTION_BYTES_LIMIT) solves the cats one at a time
+    without those tables: unbounded counts are read back from the final
+    DP, bounded ones by halving the pieces (Hirschberg-style), so memory
+    stays at a few DP rows of `capacity / gcd + 1` values.
+    """
+    volumes = np.asarray(volumes, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    single = values.ndim == 1
+    values = np.atleast_2d(values)
+    n_cats, n_items = values.shape
+    if volumes.shape != (n_items,):
+        raise ValueError("volumes and values must describe the same items")
+    if np.any(volumes <= 0):
+        raise ValueError("volumes must be positive")
+
+    # Osiągalne objętości są wielokrotnościami NWD - liczymy w jego jednostkach
+    unit = int(np.gcd.reduce(volumes)) if n_items else 1
+    volumes = volumes // unit
+    capacity = capacity // unit
+
+    if bounds is not None:
+        bounds = np.broadcast_to(np.asarray(bounds, dtype=np.int64), (n_items,))
+        # Więcej sztuk niż mieści się w plecaku nie ma sensu
+        bounds = np.minimum(bounds, capacity // volumes)
+
+    length = capacity + 1
+    max_count = capacity // volumes.min() if n_items else 0
+    scaled, scale = _integer_values(values, max_count + 1)
+    item_values = scaled if scaled is not None else values
+
+    # Jądro C działa w miejscu na wierszach int64 - te same wyniki co wersja NumPy
+    native = USE_C_IMPLEMENTATION and scaled is not None
+
+    if bounds is None:
+        parent_dtype = np.int16 if n_items <= np.iinfo(np.int16).max else np.int32
+        table_bytes = n_cats * length * np.dtype(parent_dtype).itemsize
+    else:
+        pieces = [(i, multiplicity) for i in range(n_items) for multiplicity in _binary_pieces(int(bounds[i]))]
+        piece_items = np.array([i for i, _ in pieces], dtype=np.int64)
+        piece_counts = np.array([m for _, m in pieces], dtype=np.int64)
+        weights = volumes[piece_items] * piece_counts
+        gains = item_values[:, piece_items] * piece_counts
+        table_bytes = n_cats * int(np.maximum(length - weights + 7, 0).sum() // 8)
+    if low_memory is None:
+        low_memory = table_bytes > RECONSTRUCTION_BYTES_LIMIT
+
+    counts = np.zeros((n_cats, n_items), dtype=np.int64)
+    best_volume = np.zeros(n_cats, dtype=np.int64)
+    best_value = np.zeros(n_cats, dtype=item_values.dtype)
+    # Tryb oszczędny: koty po kolei, bez tablic rekonstrukcji
+    groups = [slice(cat, cat + 1) for cat in range(n_cats)] if low_memory else [slice(0, n_cats)]
+    for rows in groups:
+        if bounds is None:
+            dp = _empty_dp(rows.stop - rows.start, length, item_values.dtype)
+            parent = None if low_memory else np.full(dp.shape, -1, dtype=parent_dtype)
+            add_item = _native_unbounded_pass if native else _unbounded_pass
+            for i in range(n_items):
+                add_item(dp, int(volumes[i]), item_values[rows, i], parent, i)
+        else:
+            dp, bits = _forward_pieces(weights, gains[rows], length, native, keep_bits=not low_memory)
+
+        # Stany nieosiągalne są mniejsze od każdej osiągalnej wartości - pierwszy najlepszy to najmniejsza objętość
+        best_volume[rows] = np.argmax(dp, axis=1)
+        best_value[rows] = dp[np.arange(dp.shape[0]), best_volume[rows]]
+
+        if bounds is not None and low_memory:
+            # Rekonstrukcja przez podział liczy własne wiersze DP - ten już niepotrzebny
+            dp = None
+        for row, cat in enumerate(range(rows.start, rows.stop)):
+            j = int(best_volume[cat])
+            if bounds is None and low_memory:
+                _walk_values(dp[row], volumes, item_values[cat], counts[cat], j)
+            elif bounds is None:
+                _walk_parents(parent[row], volumes, counts[cat], j)
+            else:
+                taken = _split_pieces(weights, gains[cat], j, native) if low_memory else _backtrack_bits(weights, bits, row, j)
+                np.add.at(counts[cat], piece_items[taken], piece_counts[taken])
+        # Zwolnienie wiersza przed utworzeniem wiersza kolejnego kota
+        dp = parent = bits = None
+
+    value = best_value / scale if scaled is not None else best_value
+    best_volume *= unit
+    result = {
+        'counts': counts,
+        'value': value.astype(np.float64),
+        'volume': best_volume
+    }
+    if single:
+        result = {'counts': counts[0], 'value': float(result['value'][0]), 'volume': int(best_volume[0])}
+    return result
@@ -0,0 +1,234 @@
+import ctypes
+import pathlib
+import platform
+from collections import deque
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+USE_C_IMPLEMENTATION = True
+
+# Domyślna długość list sąsiadów i najdłuższy odcinek przenoszony przez Or-opt
+NEIGHBOURS = 10
+MAX_SEGMENT = 3
+# Ruch musi skrócić ścieżkę co najmniej o tyle (jak LS_EPS w C)
+_EPS = 1e-9
+
+try:
+    if USE_C_IMPLEMENTATION:
+        current_dir = pathlib.Path(__file__).parent.resolve()
+        lib_path = str(current_dir / 'c_modules' / ('aco_probability.dll' if platform.system() == "Windows" else 'aco_probability.so'))
+
+        local_search_lib = ctypes.CDLL(lib_path)
+        local_search_lib.improve_path.argtypes = [
+            ctypes.POINTER(ctypes.c_double),
+            ctypes.POINTER(ctypes.c_double),
+            ctypes.c_int,
+            ctypes.POINTER(ctypes.c_int),
+            ctypes.POINTER(ctypes.c_int),
+            ctypes.c_int,
+            ctypes.c_int
+        ]
+        local_search_lib.improve_path.restype = ctypes.c_int
+        print(f"[C] Loaded local search: {lib_path}")
+except AttributeError:
+    print("[C] ACO library has no improve_path, local search runs in NumPy")
+    USE_C_IMPLEMENTATION = False
+except Exception as e:
+    print(f"[C] Error loading local search: {e}")
+    USE_C_IMPLEMENTATION = False
+
+
+def neighbour_lists(xs: np.ndarray, ys: np.ndarray, size: int) -> np.ndarray:
+    """(m, size) nearest other points of every point (closest first), from a k-d tree."""
+    m = len(xs)
+    size = min(size, m - 1)
+    if size <= 0:
+        return np.empty((m, 0), dtype=np.int32)
+
+    _, found = cKDTree(np.column_stack((xs, ys))).query(np.column_stack((xs, ys)), k=size + 1)
+    # Usuń sam punkt z jego listy (albo ostatniego sąsiada przy zduplikowanych punktach)
+    is_self = found == np.arange(m)[:, None]
+    is_self[~is_self.any(axis=1), -1] = True
+    return found[~is_self].reshape(m, size).astype(np.int32)
+
+
+class _OpenPath:
+    """
+    NumPy version of improve_path from aco_probability.c, move for move:
+    the candidates of one city are scored as vectors and the first
+    improving one (in neighbour order) is applied.
+    """
+
+    def __init__(self, xs: np.ndarray, ys: np.ndarray, neighbours: np.ndarray, max_segment: int):
+        self.xs, self.ys = xs, ys
+        self.m = len(xs)
+        self.neighbours = neighbours
+        self.max_segment = max_segment
+        self.order = np.arange(self.m)
+        self.pos = np.arange(self.m)
+        self.queue = deque(range(self.m))
+        self.queued = np.ones(self.m, dtype=bool)
+
+    def dist(self, a, b):
+        dx = self.xs[a] - self.xs[b]
+        dy = self.ys[a] - self.ys[b]
+        return np.sqrt(dx * dx + dy * dy)
+
+    def push(self, *cities):
+        for city in cities:
+            if not self.queued[city]:
+                self.queued[city] = True
+                self.queue.append(int(city))
+
+    def reverse(self, lo: int, hi: int):
+        self.order[lo:hi + 1] = self.order[lo:hi + 1][::-1].copy()
+        self.pos[self.order[lo:hi + 1]] = np.arange(lo, hi + 1)
+
+    def move_segment(self, start: int, length: int, after: int, reversed_: bool):
+        segment = self.order[start:start + length].copy()
+        if reversed_:
+            segment = segment[::-1]
+        target = self.pos[after]
+        if target < start:
+            lo, hi = target + 1, start + length
+            self.order[lo:hi] = np.concatenate((segment, self.order[target + 1:start]))
+        else:
+            lo, hi = start, target + 1
+            self.order[lo:hi] = np.concatenate((self.order[start + length:target + 1], segment))
+        self.pos[self.order[lo:hi]] = np.arange(lo, hi)
+
+    def _prefix(self, e: int, bound: float) -> tuple[np.ndarray, np.ndarray]:
+        """Neighbours of `e` (and distances) before the first one at least `bound` away."""
+        listed = self.neighbours[e]
+        d2 = self.dist(e, listed)
+        stop = np.flatnonzero(d2 >= bound)
+        cut = int(stop[0]) if len(stop) else len(listed)
+        return listed[:cut], d2[:cut]
+
+    def two_opt(self, a: int) -> bool:
+        m, order, pos = self.m, self.order, self.pos
+        for direction in (1, -1):
+            i = int(pos[a])
+            if (direction == 1 and i == m - 1) or (direction == -1 and i == 0):
+                continue
+            a1 = int(order[i + direction])
+            d1 = self.dist(a, a1)
+            c, d2 = self._prefix(a, d1)
+
+            j = pos[c]
+            valid = (j != m - 1) if direction == 1 else (j != 0)
+            c1 = order[np.clip(j + direction, 0, m - 1)]
+            valid &= (c1 != a) & (c != a1)
+            delta = d2 + self.dist(a1, c1) - d1 - self.dist(c, c1)
+            hits = np.flatnonzero(valid & (delta < -_EPS))
+            if not len(hits):
+                continue
+
+            t = int(hits[0])
+            c, c1, j = int(c[t]), int(c1[t]), int(j[t])
+            if direction == 1:
+                lo, hi = (i + 1, j) if i < j else (j + 1, i)
+            else:
+                lo, hi = (i, j - 1) if i < j else (j, i - 1)
+            self.reverse(lo, hi)
+            self.push(a, a1, c, c1)
+            return True
+        return False
+
+    def or_opt(self, a: int) -> bool:
+        m, order, pos = self.m, self.order, self.pos
+        i = int(pos[a])
+        for length in range(1, self.max_segment + 1):
+            last = i + length - 1
+            if i < 1 or last > m - 2:
+                break
+            s1, se = a, int(order[last])
+            p, nx = int(order[i - 1]), int(order[last + 1])
+            gain = self.dist(p, s1) + self.dist(se, nx) - self.dist(p, nx)
+            if gain <= _EPS:
+                continue
+
+            for side in (0, 1):
+                e, f = (s1, se) if side == 0 else (se, s1)
+                c, d2 = self._prefix(e, gain)
+                j = pos[c]
+                outside = (j < i) | (j > last)
+
+                # Wstawienie za c: c, e..f, cn
+                cn = np.where(j == i - 1, nx, order[np.minimum(j + 1, m - 1)])
+                after = d2 + self.dist(f, cn) - self.dist(c, cn) - gain
+                after_ok = outside & (j <= m - 2) & (after < -_EPS)
+                # Wstawienie przed c: cp, f..e, c
+                cp = np.where(j == last + 1, p, order[np.maximum(j - 1, 0)])
+                before = d2 + self.dist(cp, f) - self.dist(cp, c) - gain
+                before_ok = outside & (j >= 1) & (before < -_EPS)
+
+                hits = np.flatnonzero(after_ok | before_ok)
+                if not len(hits):
+                    continue
+                t = int(hits[0])
+                if after_ok[t]:
+                    self.move_segment(i, length, int(c[t]), side == 1)
+                    self.push(p, nx, s1, se, int(c[t]), int(cn[t]))
+                else:
+                    self.move_segment(i, length, int(cp[t]), side == 0)
+                    self.push(p, nx, s1, se, int(c[t]), int(cp[t]))
+                return True
+        return False
+
+    def run(self) -> int:
+        moves = 0
+        while self.queue:
+            a = self.queue.popleft()
+            self.queued[a] = False
+            if self.two_opt(a) or self.or_opt(a):
+                self.push(a)
+                moves += 1
+        return moves
+
+
+def improve_path(tour, xs: np.ndarray, ys: np.ndarray, neighbours: int = NEIGHBOURS,
+                 max_segment: int = MAX_SEGMENT, use_c: bool = True) -> np.ndarray:
+    """
+    2-opt and Or-opt local search on an open path that keeps its first
+    and last node in place. `tour` holds node ids into the coordinate
+    arrays `xs`, `ys`; the improved order of the same nodes is returned.
+
+    Moves are searched only towards the `neighbours` nearest nodes of the
+    path, and only around nodes whose surroundings changed since they were
+    last checked ("don't look" bits), so one pass is close to linear.
+    Or-opt moves segments of up to `max_segment` nodes, optionally reversed.
+    Runs in the C library when available (same moves as the NumPy version).
+    """
+    tour = np.asarray(tour, dtype=np.intp)
+    m = len(tour)
+    if m < 4:
+        return tour.copy()
+
+    # Lokalne współrzędne punktów ścieżki - pamięć O(m), niezależnie od liczby wszystkich punktów
+    local_x = np.ascontiguousarray(xs[tour], dtype=np.float64)
+    local_y = np.ascontiguousarray(ys[tour], dtype=np.float64)
+    lists = np.ascontiguousarray(neighbour_lists(local_x, local_y, neighbours))
+    max_segment = max(0, min(max_segment, 8, m - 2))
+
+    if use_c and USE_C_IMPLEMENTATION:
+        order = np.arange(m, dtype=np.int32)
+        double_p = ctypes.POINTER(ctypes.c_double)
+        moves = local_search_lib.improve_path(
+            local_x.ctypes.data_as(double_p),
+            local_y.ctypes.data_as(double_p),
+            m,
+            order.ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+            lists.ctypes.data_as(ctypes.POINTER(ctypes.c_int)),
+            lists.shape[1],
+            max_segment
+        )
+        if moves < 0:
+            raise MemoryError("improve_path could not allocate its work buffers")
+    else:
+        search = _OpenPath(local_x, local_y, lists, max_segment)
+        search.run()
+        order = search.order
+
+    return tour[order]
@@ -1,5 +1,5 @@
+from collections import OrderedDict
 from math import sqrt
-import random
 import time
 import ctypes
 import numpy as np
@@ -9,72 +9,268 @@ import pathlib
 # Globalna flaga do kontroli implementacji
 USE_C_IMPLEMENTATION = True
 
+from modules.common.map import Map
 from modules.common.path import Path
 from modules.common.point import Point
-from modules.custers import get_all_points_in_clusters
+from modules.common.point_set import PointSet, as_point_set
+from modules.common.distance_oracle import DENSE_LIMIT, DistanceOracle
+from modules.common.spatial_index import GridIndex
+from modules.aco import AntColony, MultiColony
+from modules.custers import create_clusters, get_all_points_in_clusters, get_cluster_ids_in_square_between_points
+from modules.local_search import improve_path
+
+# Największa liczba węzłów ACO - kolonia trzyma kilka macierzy n x n (przy 10000 węzłów po 800 MB)
+ACO_NODE_LIMIT = 10000
+
+# Biblioteka ACO ładowana raz na proces i współdzielona przez wszystkie instancje PathFinding
+aco_lib = None
+HAS_NATIVE_TOURS = False
+
+if USE_C_IMPLEMENTATION:
+    try:
+        current_dir = pathlib.Path(__file__).parent.resolve()
+        lib_path = str(current_dir / 'c_modules' / ('aco_probability.dll' if platform.system() == "Windows" else 'aco_probability.so'))
+
+        aco_lib = ctypes.CDLL(lib_path)
+        aco_lib.calculate_probabilities.argtypes = [
+            ctypes.POINTER(ctypes.c_double),
+            ctypes.POINTER(ctypes.c_double),
+            ctypes.POINTER(ctypes.c_double),
+            ctypes.c_int,
+            ctypes.c_double,
+            ctypes.c_double
+        ]
+        print(f"[C] Loaded ACO library: {lib_path}")
+
+        try:
+            aco_lib.build_tours.argtypes = [
+                ctypes.POINTER(ctypes.c_double),
+                ctypes.POINTER(ctypes.c_double),
+                ctypes.c_int,
+                ctypes.c_int,
+                ctypes.c_int,
+                ctypes.c_double,
+                ctypes.c_double,
+                ctypes.POINTER(ctypes.c_int),
+                ctypes.c_int,
+                ctypes.POINTER(ctypes.c_ulonglong),
+                ctypes.POINTER(ctypes.c_int),
+                ctypes.POINTER(ctypes.c_double)
+            ]
+            aco_lib.build_tours.restype = ctypes.c_int
+            HAS_NATIVE_TOURS = True
+        except AttributeError:
+            print("[C] ACO library has no build_tours, tours are built in Python")
+    except Exception as e:
+        print(f"[C] Error loading ACO library: {e}")
+        aco_lib = None
+        USE_C_IMPLEMENTATION = False
+
+
+def _smallest_indices(values: np.ndarray, count: int) -> np.ndarray:
+    """
+    Indices (ascending) of the `count` smallest values, ties broken by the
+    lower index - the same set as a stable argsort cut at `count`, found
+    with argpartition in O(n).
+    """
+    if count >= len(values):
+        return np.arange(len(values))
+    if count <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    threshold = values[np.argpartition(values, count - 1)[count - 1]]
+    below = np.flatnonzero(values < threshold)
+    # Remisy na granicy: wartości równe progowi w kolejności indeksów
+    tied = np.flatnonzero(values == threshold)[:count - len(below)]
+    return np.sort(np.concatenate((below, tied)))
+
 
 class PathFinding:
-    def __init__(self, points: list[Point], start: Point, end: Point, k: int = 100):
-        # Deklaracja global na początku funkcji
-        global USE_C_IMPLEMENTATION
-        
+    def __init__(self, points: list[Point] | PointSet, start: Point, end: Point, k: int = 100,
+                 candidate_list_size: int = None, points_oracle: DistanceOracle = None,
+                 dense_limit: int = DENSE_LIMIT, aco_node_limit: int = ACO_NODE_LIMIT):
+        """
+        `candidate_list_size` enables nearest-neighbour candidate lists of
+        that size for greedy and ACO steps (None scores every unvisited point).
+        `points_oracle` is an oracle over `points` (e.g. cached by
+        PathFindingSession); when start and end are among the points, the
+        node distances are taken from it instead of being recomputed.
+        `dense_limit` is the largest node count whose distance matrix the
+        oracle keeps (see DistanceOracle); ACO builds its own matrix anyway.
+        Above `aco_node_limit` nodes ACO falls back to the greedy path with
+        local search (see aco_iter).
+        """
         self.points = points
         self.start = start
         self.end = end
         self.k = k
-        
-        # Ładowanie biblioteki C dla ACO
-        if USE_C_IMPLEMENTATION:
-            try:
-                current_dir = pathlib.Path(__file__).parent.resolve()
-                # Poprawiona ścieżka - przejdź do folderu common/c_modules
-                lib_path = str(current_dir / 'c_modules' / ('aco_probability.dll' if platform.system() == "Windows" else 'aco_probability.so'))
-                
-                self._aco_lib = ctypes.CDLL(lib_path)
-                self._aco_lib.calculate_probabilities.argtypes = [
-                    ctypes.POINTER(ctypes.c_double),
-                    ctypes.POINTER(ctypes.c_double),
-                    ctypes.POINTER(ctypes.c_double),
-                    ctypes.c_int,
-                    ctypes.c_double,
-                    ctypes.c_double
-                ]
-                print(f"[C] Loaded ACO library: {lib_path}")
-            except Exception as e:
-                print(f"[C] Error loading ACO library: {e}")
-                USE_C_IMPLEMENTATION = False
-
-    def greedy_path(self) -> Path:
+        self.candidate_list_size = candidate_list_size
+        self.aco_node_limit = aco_node_limit
+        self._candidate_lists = None
+        self._greedy_cache = {}
+        self._heuristic_cache = None
+        # Feromony ostatniego przebiegu ACO (do ciepłego startu kolejnych zapytań)
+        self.pheromones = None
+        # Przebieg ostatniego wyszukiwania ACO: liczba iteracji, powód zatrzymania, najlepsza długość
+        self.aco_stats = None
+        self._aco_lib = aco_lib
+        self._has_native_tours = HAS_NATIVE_TOURS
+
+        self._build_nodes()
+        # Odległości liczone raz na instancję i współdzielone przez greedy i ACO
+        if points_oracle is not None and self._point_positions is not None and (self._point_positions >= 0).all():
+            self.oracle = points_oracle.subset(self._point_positions, dense_limit)
+        else:
+            self.oracle = DistanceOracle(self.nodes, dense_limit)
+
+    def _build_nodes(self):
+        """
+        Lays out the points used by the search: node 0 is the start,
+        nodes 1..n-2 are the intermediate candidates, node n-1 is the end.
+        """
+        if isinstance(self.points, PointSet):
+            keep = np.ones(len(self.points), dtype=bool)
+            for keep_end in self._end_masks():
+                keep &= keep_end
+            candidates = self.points.take(keep)
+            self._candidate_points = None
+            # Pozycja każdego węzła w `points` (-1: początek / koniec spoza zbioru)
+            ends = [np.flatnonzero(~keep_end) for keep_end in self._end_masks()]
+            self._point_positions = np.concatenate((
+                [ends[0][0] if len(ends[0]) else -1], np.flatnonzero(keep), [ends[1][0] if len(ends[1]) else -1]
+            ))
+        else:
+            self._candidate_points = [p for p in self.points if p != self.start and p != self.end]
+            candidates = PointSet.from_points(self._candidate_points)
+            self._point_positions = None
+
+        ends = PointSet.from_points([self.start, self.end])
+        self.nodes = PointSet.concatenate([ends[:1], candidates, ends[1:]])
+        self._end_node = len(self.nodes) - 1
+
+    def _end_masks(self) -> list[np.ndarray]:
+        """For the start and the end: mask of the points that are not it (by id, else by position)."""
+        masks = []
+        for p in (self.start, self.end):
+            if p.id is not None:
+                masks.append(self.points.ids != p.id)
+            else:
+                masks.append((self.points.x != p.x) | (self.points.y != p.y))
+        return masks
+
+    def candidate_lists(self) -> np.ndarray:
+        """
+        (n, m) nearest intermediate nodes of every node, closest first,
+        built once from a k-d tree. None if candidate lists are disabled.
+        """
+        if not self.candidate_list_size:
+            return None
+        if self._candidate_lists is None:
+            intermediate = np.arange(1, self._end_node)
+            self._candidate_lists = self.oracle.neighbour_lists(self.candidate_list_size, intermediate)
+        return self._candidate_lists
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the cached tables (distances, heuristic, pheromones, candidate lists)."""
+        tables = [self.pheromones, self._candidate_lists]
+        if self._heuristic_cache is not None:
+            tables.append(self._heuristic_cache[1])
+        return self.oracle.nbytes + sum(table.nbytes for table in tables if table is not None)
+
+    def _node_point(self, i: int) -> Point:
+        if i == 0:
+            return self.start
+        if i == self._end_node:
+            return self.end
+        if self._candidate_points is not None:
+            return self._candidate_points[i - 1]
+        return self.nodes.point(i)
+
+    def _to_path(self, tour) -> Path:
+        return Path(self.start, self.end, [self._node_point(int(i)) for i in tour])
+
+    def greedy_path(self, local_search: bool = False) -> Path:
+        """Nearest-neighbour path; `local_search` refines it with 2-opt / Or-opt."""
         start_time = time.time()
 
-        if self.k < 2:
+        tour = self._greedy_tour()
+        if local_search:
+            tour = self.improve_tour(tour)
+
+        best_path = self._to_path(tour)
+        total_time = time.time() - start_time
+        print(f"\n[GREEDY] Total time: {total_time:.2f} seconds")
+        print(f"[GREEDY] Best path: {round(self.oracle.path_length(tour) / 100, 2)} m\n")
+        return best_path
+
+    def improve_tour(self, tour) -> np.ndarray:
+        """2-opt / Or-opt local search on a tour of node indices (start and end stay in place)."""
+        return improve_path(tour, self.nodes.x, self.nodes.y)
+
+    def _heuristic(self, distances: np.ndarray, beta: float) -> np.ndarray:
+        """
+        ACO heuristic (1 / d)^beta over the nodes, kept for repeated runs with
+        the same beta while the oracle keeps its matrix (up to dense_limit).
+        """
+        if self._heuristic_cache is not None and self._heuristic_cache[0] == beta:
+            return self._heuristic_cache[1]
+        heuristic = (1.0 / (distances + 1e-6)) ** beta
+        if self.oracle.dense:
+            self._heuristic_cache = (beta, heuristic)
+        return heuristic
+
+    def _greedy_tour(self, size: int = None) -> list[int]:
+        """
+        Nearest-neighbour tour (node indices) of `size` points (default k):
+        start, the size-2 points closest to the start-end segment, end.
+        Computed once per size and reused (e.g. as the ACO starting tour of
+        repeated queries).
+        """
+        size = self.k if size is None else size
+        if size < 2:
             raise ValueError("k must be at least 2 (start and end)")
+        if size in self._greedy_cache:
+            return list(self._greedy_cache[size])
 
-        candidates = [p for p in self.points if p != self.start and p != self.end]
+        # Odchylenie od odcinka start-koniec (elipsa) - dwa wektorowe przebiegi po kandydatach
+        intermediate = np.arange(1, self._end_node)
+        bias = self.oracle.distances(0, intermediate) + self.oracle.distances(self._end_node, intermediate)
+        selected = _smallest_indices(bias, size - 2) + 1
 
-        def bias(p: Point) -> float:
-            return Point.distance(self.start, p) + Point.distance(p, self.end)
+        available = np.zeros(len(self.nodes), dtype=bool)
+        available[selected] = True
+        lists = self.candidate_lists()
 
-        candidates.sort(key=bias)
-        selected = candidates[:self.k - 2]
+        # Indeks przestrzenny wybranych punktów - odwiedzone punkty są z niego usuwane
+        index = GridIndex(self.nodes.x[selected], self.nodes.y[selected])
+        position = np.empty(len(self.nodes), dtype=np.intp)
+        position[selected] = np.arange(len(selected))
 
-        unvisited = set(selected)
-        path_points = [self.start]
-        current = self.start
+        tour = [0]
+        current = 0
 
-        while unvisited:
-            next_point = min(unvisited, key=lambda p: Point.distance(current, p))
-            path_points.append(next_point)
-            unvisited.remove(next_point)
-            current = next_point
+        for _ in range(len(selected)):
+            next_node = -1
 
-        path_points.append(self.end)
+            # Listy są posortowane po odległości - pierwszy dostępny sąsiad jest najbliższy
+            if lists is not None:
+                listed = lists[current]
+                free = available[listed]
+                if free.any():
+                    next_node = int(listed[np.argmax(free)])
 
-        best_path = Path(self.start, self.end, path_points)
-        total_time = time.time() - start_time
-        print(f"\n[GREEDY] Total time: {total_time:.2f} seconds")
-        print(f"[GREEDY] Best path: {round(best_path.distance() / 100, 2)} m\n")
-        return best_path
+            if next_node < 0:
+                next_node = int(selected[index.nearest(self.nodes.x[current], self.nodes.y[current])])
+
+            tour.append(next_node)
+            available[next_node] = False
+            index.remove(position[next_node])
+            current = next_node
+
+        tour.append(self._end_node)
+        self._greedy_cache[size] = tour
+        return list(tour)
 
     def aco_path(
         self,
@@ -84,140 +280,342 @@ class PathFinding:
         beta: float = 5.0,
         evaporation_rate: float = 0.5,
         pheromone_deposit: float = 100.0,
+        seed: int = None,
+        use_c_tours: bool = False,
+        colonies: int = 1,
+        workers: int = None,
+        exchange_interval: int = 5,
+        local_search: bool = False,
+        pheromones: np.ndarray = None,
+        time_limit: float = None,
+        max_stagnation: int = None,
+        target_length: float = None,
+        callback=None,
     ) -> Path:
-        
+        """
+        Ant colony search for a path through exactly k intermediate points.
+        With `use_c_tours` every iteration's tours are built by one call
+        into the C library (falls back to NumPy if it is not available).
+        With `colonies` > 1, independent colonies of `num_ants` ants run on
+        `workers` threads and exchange their best tours every
+        `exchange_interval` iterations (see MultiColony).
+        With `local_search`, the greedy starting tour and the best ant of
+        every iteration are refined with 2-opt / Or-opt (improve_tour).
+        `pheromones` (n x n over the nodes) replaces the uniform initial
+        pheromone table; the final table is kept in `self.pheromones`.
+
+        `time_limit`, `max_stagnation` and `target_length` stop the search
+        early (see aco_iter); `callback` is called with every improving
+        best Path. Returns the best path found (the greedy starting tour if
+        no ant beat it).
+        """
         start_time = time.time()
 
-        candidates = [p for p in self.points if p != self.start and p != self.end]
-
-        if len(candidates) < self.k:
-            raise ValueError(f"Not enough intermediate points ({len(candidates)}) for k={self.k}")
-
-        # Initial greedy path to get starting solution
-        greedy_solution = self.greedy_path()
-        greedy_points = greedy_solution.points
-
-        # Initialize pheromones
-        all_points = [self.start] + candidates + [self.end]
-        pheromones = {(a, b): 100.0 for a in all_points for b in all_points if a != b}
-
-        # Boost pheromones on greedy path edges
-        for i in range(min(len(greedy_points) - 1, self.k + 1)):
-            a, b = greedy_points[i], greedy_points[i + 1]
-            pheromones[(a, b)] += pheromone_deposit
-            pheromones[(b, a)] += pheromone_deposit
-
         best_path = None
-        best_length = float('inf')
-
-        for iteration in range(num_iterations):
-            all_paths = []
-
-            for ant in range(num_ants):
-                path = [self.start]
-                current = self.start
-                unvisited = set(candidates)
-
-                # Select exactly k intermediate points
-                for _ in range(self.k):
-                    if not unvisited:
-                        break
-                        
-                    # Prepare data for C function
-                    candidate_list = list(unvisited)
-                    n = len(candidate_list)
-                    
-                    pheromones_arr = np.zeros(n, dtype=np.float64)
-                    distances_arr = np.zeros(n, dtype=np.float64)
-                    
-                    for i, point in enumerate(candidate_list):
-                        pheromones_arr[i] = pheromones[(current, point)]
-                        distances_arr[i] = Point.distance(current, point)
-
-                    if USE_C_IMPLEMENTATION:
-                        probabilities = self._calculate_probabilities_c(
-                            pheromones_arr, 
-                            distances_arr, 
-                            alpha, 
-                            beta
-                        )
-                        # Ustaw total_prob dla bezpieczeństwa
-                        total_prob = 1.0
-                    else:
-                        # Oryginalna implementacja Python
-                        probabilities = []
-                        total_prob = 0.0
-                        
-                        for i, point in enumerate(candidate_list):
-                            tau = pheromones_arr[i]
-                            dist = distances_arr[i]
-                            eta = 1.0 / (dist + 1e-6)
-                            prob = (tau ** alpha) * (eta ** beta)
-                            probabilities.append(prob)
-                            total_prob += prob
-                        
-                        if total_prob > 0:
-                            probabilities = [p / total_prob for p in probabilities]
-                        else:
-                            probabilities = [1.0 / n] * n
-
-                    # Wybór następnego punktu
-                    if total_prob > 0:
-                        r = random.random()
-                        cumulative = 0.0
-                        for i, point in enumerate(candidate_list):
-                            cumulative += probabilities[i]
-                            if r <= cumulative:
-                                next_point = point
-                                break
-                    else:
-                        next_point = random.choice(candidate_list)
-
-                    path.append(next_point)
-                    unvisited.remove(next_point)
-                    current = next_point
-
-                # Add end point
-                path.append(self.end)
-
-                # Calculate path length
-                length = sum(Point.distance(path[i], path[i + 1]) for i in range(len(path) - 1))
-                all_paths.append((path, length))
-
-                if length < best_length:
-                    best_length = length
-                    best_path = path
-                    print(f"[ACO] Iteration {iteration}, Ant {ant}: New best length = {best_length:.2f}")
-
-            # Evaporate pheromones
-            for key in pheromones:
-                pheromones[key] *= (1 - evaporation_rate)
-
-            # Deposit pheromones
-            for path, length in all_paths:
-                deposit = pheromone_deposit / (length + 1e-6)
-                for i in range(len(path) - 1):
-                    a, b = path[i], path[i + 1]
-                    pheromones[(a, b)] += deposit
-                    pheromones[(b, a)] += deposit
-
-        best_path = Path(self.start, self.end, best_path)
+        for best_path in self.aco_iter(
+            num_ants=num_ants, num_iterations=num_iterations,
+            alpha=alpha, beta=beta,
+            evaporation_rate=evaporation_rate, pheromone_deposit=pheromone_deposit,
+            seed=seed, use_c_tours=use_c_tours,
+            colonies=colonies, workers=workers, exchange_interval=exchange_interval,
+            local_search=local_search, pheromones=pheromones,
+            time_limit=time_limit, max_stagnation=max_stagnation, target_length=target_length,
+        ):
+            if callback is not None:
+                callback(best_path)
+
         total_time = time.time() - start_time
-        print(f"\n[ACO] Total time: {total_time:.2f} seconds")
-        print(f"[ACO] Best path: {round(best_path.distance() / 100, 2)} m")
+        print(f"\n[ACO] Total time: {total_time:.2f} seconds ({self.aco_stats['iterations']} iterations, stop: {self.aco_stats['stop']})")
+        print(f"[ACO] Best path: {round(self.aco_stats['best_length'] / 100, 2)} m")
         return best_path
 
-    def _calculate_probabilities_c(self, pheromones, distances, alpha, beta):
-        """Wywołanie funkcji C do obliczenia prawdopodobieństw"""
-        n = len(pheromones)
-        probs = np.zeros(n, dtype=np.float64)
-        
-        self._aco_lib.calculate_probabilities(
-            probs.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
-            pheromones.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
-            distances.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
-            n,
-            ctypes.c_double(alpha),
-            ctypes.c_double(beta)
+    def aco_iter(
+        self,
+        num_ants: int = 20,
+        num_iterations: int = 100,
+        alpha: float = 1.0,
+        beta: float = 5.0,
+        evaporation_rate: float = 0.5,
+        pheromone_deposit: float = 100.0,
+        seed: int = None,
+        use_c_tours: bool = False,
+        colonies: int = 1,
+        workers: int = None,
+        exchange_interval: int = 5,
+        local_search: bool = False,
+        pheromones: np.ndarray = None,
+        time_limit: float = None,
+        max_stagnation: int = None,
+        target_length: float = None,
+    ):
+        """
+        Anytime ant colony search (parameters as in aco_path): a generator
+        yielding the best Path every time it improves, so the caller can
+        use or stop at any point. The first Path is the greedy starting
+        tour through k intermediate points, yielded before the colony is
+        built, so a result exists even within a short budget; later ones
+        are ant tours shorter than every Path yielded before.
+
+        The search ends after `num_iterations` (None: no limit), when the
+        next iteration would not finish within `time_limit` seconds of the
+        start (judged by the last one), after `max_stagnation` iterations
+        without improvement, or once the best length (all edges from start
+        to end, in map units) is at most `target_length`. Why it ended
+        ('closed' if the generator was closed early), the iteration count
+        and the best length are kept in `self.aco_stats`.
+
+        `time_limit` is checked before building the colony and before every
+        iteration; building the distance matrix and the colony is not
+        interrupted, so a budget shorter than that is overrun (the greedy
+        Path is still yielded in time).
+
+        Above `aco_node_limit` nodes the n x n tables of the colony would not
+        fit in memory: the greedy tour through k intermediate points,
+        refined by local search, is yielded as the only Path instead
+        (stop reason 'node_limit').
+        """
+        if num_iterations is None and time_limit is None and max_stagnation is None and target_length is None:
+            raise ValueError("num_iterations, time_limit, max_stagnation or target_length must limit the search")
+        start_time = time.perf_counter()
+        deadline = start_time + time_limit if time_limit is not None else None
+
+        native = None
+        if use_c_tours:
+            if USE_C_IMPLEMENTATION and self._has_native_tours:
+                native = self._aco_lib
+            else:
+                print("[C] build_tours not available, using NumPy tours")
+
+        n_candidates = self._end_node - 1
+        if n_candidates < self.k:
+            raise ValueError(f"Not enough intermediate points ({n_candidates}) for k={self.k}")
+
+        self.aco_stats = {'iterations': 0, 'stop': 'running', 'best_length': float('inf')}
+        if len(self.nodes) > self.aco_node_limit:
+            print(f"[ACO] {len(self.nodes)} nodes exceed aco_node_limit={self.aco_node_limit}, "
+                  f"using greedy path with local search")
+            tour = self.improve_tour(self._greedy_tour(self.k + 2))
+            self.aco_stats.update(stop='node_limit', best_length=self.oracle.path_length(tour))
+            yield self._to_path(tour)
+            return
+
+        colony = None
+        try:
+            # Initial greedy path through k points - the first best path, later boosts pheromones on its edges
+            initial_tour = self._greedy_tour(self.k + 2)
+            if local_search:
+                initial_tour = self.improve_tour(initial_tour)
+            best_length = self.oracle.path_length(initial_tour)
+            self.aco_stats['best_length'] = best_length
+            yield self._to_path(initial_tour)
+
+            if target_length is not None and best_length <= target_length:
+                self.aco_stats['stop'] = 'target_length'
+                return
+            if deadline is not None and time.perf_counter() >= deadline:
+                self.aco_stats['stop'] = 'time_limit'
+                return
+
+            # Macierz odległości pobierana raz i współdzielona przez heurystykę i kolonie
+            # (powyżej dense_limit liczona tylko dla tego wyszukiwania)
+            distances = self.oracle.full_matrix()
+            colony_params = dict(
+                alpha=alpha, beta=beta,
+                evaporation_rate=evaporation_rate,
+                pheromone_deposit=pheromone_deposit,
+                seed=seed,
+                native=native,
+                candidate_lists=self.candidate_lists(),
+                heuristic=self._heuristic(distances, beta),
+                improve=self.improve_tour if local_search else None,
+                pheromones=pheromones,
+            )
+            if colonies > 1:
+                colony = MultiColony(
+                    distances, self.k,
+                    colonies=colonies, workers=workers,
+                    exchange_interval=exchange_interval,
+                    **colony_params
+                )
+            else:
+                colony = AntColony(distances, self.k, **colony_params)
+            colony.reinforce(initial_tour, pheromone_deposit)
+
+            stagnation = 0
+            iteration = 0
+            last_duration = 0.0
+            while num_iterations is None or iteration < num_iterations:
+                # Limit czasu sprawdzany przed iteracją - szacowany czasem poprzedniej
+                iteration_start = time.perf_counter()
+                if deadline is not None and iteration_start + last_duration > deadline:
+                    self.aco_stats['stop'] = 'time_limit'
+                    break
+
+                tours, lengths = colony.iterate(num_ants)
+                iteration += 1
+                last_duration = time.perf_counter() - iteration_start
+                self.aco_stats['iterations'] = iteration
+
+                # Poprawa liczona względem najlepszej dotąd ścieżki, łącznie z początkową
+                if colony.best_length < best_length:
+                    best_length = colony.best_length
+                    self.aco_stats['best_length'] = best_length
+                    stagnation = 0
+                    ant = int(np.argmin(lengths))
+                    print(f"[ACO] Iteration {iteration - 1}, Ant {ant}: New best length = {best_length:.2f}")
+                    yield self._to_path(colony.best_tour)
+                else:
+                    stagnation += 1
+
+                if target_length is not None and best_length <= target_length:
+                    self.aco_stats['stop'] = 'target_length'
+                    break
+                if max_stagnation is not None and stagnation >= max_stagnation:
+                    self.aco_stats['stop'] = 'stagnation'
+                    break
+            else:
+                self.aco_stats['stop'] = 'iterations'
+        except GeneratorExit:
+            self.aco_stats['stop'] = 'closed'
+            raise
+        finally:
+            self.pheromones = colony.pheromones if colony is not None else pheromones
+            if isinstance(colony, MultiColony):
+                colony.close()
+
+def _point_key(p: Point) -> tuple:
+    return (p.x, p.y, p.id)
+
+
+class PathFindingSession:
+    """
+    Long-lived solver answering many start/end queries on one Map.
+
+    The cluster grid of the map is built once. For every query the
+    clusters around start and end are selected as in custers.run; the
+    distance oracle of every selection and the prepared PathFinding of
+    every (selection, start, end) are kept in LRU caches of at most
+    `cache_size` entries and `max_cache_bytes` of tables each (the newest
+    entry is kept whatever its size), so repeated and nearby queries reuse
+    distances, candidate lists and the greedy starting tour. The ACO library is loaded once,
+    when this module is imported.
+
+    With `warm_pheromones`, an ACO query whose start and end lie within
+    `warm_radius` of those of the previous ACO query starts from its
+    final pheromones, mapped by point id (edges to new points start at
+    the mean level of the carried table).
+
+    `dense_limit` is passed to the distance oracles (see PathFinding).
+    """
+
+    def __init__(self, map: Map, k: int = 100, cluster_size: int = 100, map_size: int = 10000,
+                 candidate_list_size: int = None, cache_size: int = 8,
+                 warm_pheromones: bool = False, warm_radius: float = 1000,
+                 dense_limit: int = DENSE_LIMIT, max_cache_bytes: int = 512 * 1024 * 1024):
+        self.map = map
+        self.points = as_point_set(map.points)
+        self.k = k
+        self.cluster_size = cluster_size
+        self.map_size = map_size
+        self.candidate_list_size = candidate_list_size
+        self.cache_size = max(1, cache_size)
+        self.max_cache_bytes = max_cache_bytes
+        self.warm_pheromones = warm_pheromones
+        self.warm_radius = warm_radius
+        self.dense_limit = dense_limit
+
+        # Numery klastrów z pliku binarnego, jeśli pasują do siatki sesji
+        cluster_ids = None
+        if map.cluster_ids is not None and map.cluster_size == cluster_size and map.grid_size == map_size // cluster_size:
+            cluster_ids = map.cluster_ids
+        self.clusters = create_clusters(self.points, cluster_size, map_size, cluster_ids)
+
+        self._oracles = OrderedDict()
+        self._queries = OrderedDict()
+        self._warm = None
+
+    def _cached(self, cache: OrderedDict, key, build):
+        """Value of `key` in an LRU cache, built on a miss (old entries are evicted by _trim)."""
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            return value
+        value = build()
+        cache[key] = value
+        self._trim()
+        return value
+
+    def _trim(self):
+        """Evicts the oldest entries of both caches above `cache_size` entries or `max_cache_bytes`."""
+        # Rozmiar wpisów rośnie po zapytaniach (macierze, heurystyka, feromony) - liczony przy każdym przycięciu
+        for cache in (self._queries, self._oracles):
+            while len(cache) > 1 and (len(cache) > self.cache_size or
+                                      sum(value.nbytes for value in cache.values()) > self.max_cache_bytes):
+                cache.popitem(last=False)
+
+    def prepare(self, start: Point, end: Point) -> PathFinding:
+        """PathFinding for the query (cached), over the points of the clusters around start and end."""
+        selected = get_cluster_ids_in_square_between_points(
+            self.clusters, start, end, self.cluster_size, self.map_size, self.k
         )
-        return probs
\ No newline at end of file
+        region = tuple(selected)
+
+        def build() -> PathFinding:
+            oracle = self._cached(self._oracles, region,
+                                  lambda: DistanceOracle(self.clusters.points_in(region), self.dense_limit))
+            return PathFinding(oracle.points, start, end, self.k, self.candidate_list_size,
+                               points_oracle=oracle, dense_limit=self.dense_limit)
+
+        return self._cached(self._queries, (region, _point_key(start), _point_key(end)), build)
+
+    def greedy_path(self, start: Point, end: Point, local_search: bool = False) -> Path:
+        path = self.prepare(start, end).greedy_path(local_search=local_search)
+        self._trim()
+        return path
+
+    def aco_path(self, start: Point, end: Point, **aco_params) -> Path:
+        """PathFinding.aco_path for the query; `aco_params` are passed through."""
+        finder = self.prepare(start, end)
+        pheromones = self._warm_start(finder) if self.warm_pheromones else None
+        path = finder.aco_path(pheromones=pheromones, **aco_params)
+        self._keep_pheromones(finder)
+        return path
+
+    def aco_iter(self, start: Point, end: Point, **aco_params):
+        """PathFinding.aco_iter for the query: yields every improving best Path."""
+        finder = self.prepare(start, end)
+        pheromones = self._warm_start(finder) if self.warm_pheromones else None
+        try:
+            yield from finder.aco_iter(pheromones=pheromones, **aco_params)
+        finally:
+            self._keep_pheromones(finder)
+
+    def _keep_pheromones(self, finder: PathFinding):
+        """Remembers the final pheromones of a query for warm starts, then re-checks the cache size."""
+        if self.warm_pheromones and finder.pheromones is not None:
+            self._warm = (finder.start, finder.end, finder.nodes.ids, finder.pheromones)
+        self._trim()
+
+    def _warm_start(self, finder: PathFinding) -> np.ndarray | None:
+        """Pheromones of the previous ACO query mapped onto the nodes of `finder`, if it was close enough."""
+        if self._warm is None:
+            return None
+        start, end, ids, pheromones = self._warm
+        if Point.distance(start, finder.start) > self.warm_radius or Point.distance(end, finder.end) > self.warm_radius:
+            return None
+
+        # Początek i koniec odpowiadają sobie z definicji, punkty pośrednie - przez id
+        old_inner = ids[1:-1]
+        new_inner = finder.nodes.ids[1:-1]
+        source = np.full(len(new_inner), -1, dtype=np.intp)
+        if len(old_inner):
+            order = np.argsort(old_inner)
+            found = order[np.minimum(np.searchsorted(old_inner, new_inner, sorter=order), len(old_inner) - 1)]
+            source = np.where(old_inner[found] == new_inner, found + 1, -1)
+        mapping = np.concatenate(([0], source, [len(ids) - 1]))
+
+        n = len(mapping)
+        table = np.full((n, n), pheromones.mean())
+        known = np.flatnonzero(mapping >= 0)
+        table[np.ix_(known, known)] = pheromones[np.ix_(mapping[known], mapping[known])]
+        return table
@@ -0,0 +1,73 @@
+import numpy as np
+from scipy.ndimage import label
+
+
+def largest_component(free: np.ndarray) -> np.ndarray | None:
+    """
+    Mask of the largest 4-connected component of `free` (the first one in
+    label order on ties), or None if there are no free cells.
+    """
+    labeled, num_features = label(free)
+    if num_features == 0:
+        return None
+
+    # Rozmiary wszystkich składowych jednym przejściem (etykieta 0 to tło)
+    sizes = np.bincount(labeled.ravel(), minlength=num_features + 1)
+    sizes[0] = 0
+    return labeled == int(np.argmax(sizes))
+
+
+def _first_allowed(cells: np.ndarray, n_cols: int, seeds: list[tuple[int, int]],
+                   min_distance: float, chunk: int = 1024) -> int:
+    """
+    First of `cells` (flat indices, best first) at least `min_distance`
+    from every seed, or -1. Candidates are checked in chunks, so usually
+    only the best few are ever looked at.
+    """
+    if not seeds:
+        return int(cells[0]) if len(cells) else -1
+
+    seed_rows = np.array([s[0] for s in seeds], dtype=np.int64)
+    seed_cols = np.array([s[1] for s in seeds], dtype=np.int64)
+    for start in range(0, len(cells), chunk):
+        part = cells[start:start + chunk]
+        rows, cols = part // n_cols, part % n_cols
+        dist = np.sqrt((rows[:, None] - seed_rows[None, :])**2 + (cols[:, None] - seed_cols[None, :])**2)
+        allowed = np.flatnonzero((dist >= min_distance).all(axis=1))
+        if len(allowed):
+            return int(part[allowed[0]])
+    return -1
+
+
+def select_seeds(component: np.ndarray, value_grids: list[np.ndarray], min_distance: float) -> list[tuple[int, int]]:
+    """
+    One seed cell per value grid (one per cat, in order): the cell of
+    `component` with the highest value (first in row-major order on ties)
+    that lies at least `min_distance` cells from all earlier seeds. If no
+    cell is far enough, the best cell that is not a seed yet is taken.
+
+    The best cell is a masked argmax; only if it is too close to an
+    earlier seed is the grid ranked (stable argsort), and then only the
+    top candidates are checked against the earlier seeds.
+    """
+    n_cols = component.shape[1]
+    cells = np.flatnonzero(component)
+    if len(cells) < len(value_grids):
+        raise RuntimeError(f"Obszar za mały na {len(value_grids)} punkty startowe")
+
+    seeds = []
+    for grid in value_grids:
+        values = np.asarray(grid).ravel()[cells]
+
+        # Zwykle najlepsza komórka (maskowany argmax) spełnia warunek odległości - bez sortowania
+        best = _first_allowed(cells[[int(np.argmax(values))]], n_cols, seeds, min_distance)
+        if best < 0:
+            ranked = cells[np.argsort(-values.astype(np.float64), kind='stable')]
+            best = _first_allowed(ranked, n_cols, seeds, min_distance)
+        if best < 0:
+            # Brak komórki w wymaganej odległości - najlepsza, która nie jest jeszcze punktem startowym
+            taken = np.array([i * n_cols + j for i, j in seeds], dtype=np.int64)
+            best = int(ranked[~np.isin(ranked, taken)][0])
+
+        seeds.append((best // n_cols, best % n_cols))
+    return seeds
@@ -1,9 +1,10 @@
 import tkinter as tk
 from modules.common.point import Point
+from modules.common.point_set import PointSet
 from modules.common.path import Path
 
-def visualize(points: list[Point], 
-                               clusters: list[list[Point]], 
+def visualize(points: list[Point] | PointSet, 
+                               clusters: list[list[Point]] | list[PointSet], 
                                selected_clusters: list[int],
                                cluster_size: int, 
                                map_size: int,
@@ -20,6 +21,7 @@ def visualize(points: list[Point],
     - `path`: An optional Path instance containing a start, end, and path (ordered points).
     """
     grid_size = map_size // cluster_size
+    selected_clusters = set(selected_clusters)
     canvas_size = 800
     scale = canvas_size / map_size
 
@@ -45,9 +47,13 @@ def visualize(points: list[Point],
 
     # Draw all points (small black dots)
     if draw_points:
-        for point in points:
-            px = point.x * scale
-            py = point.y * scale
+        if isinstance(points, PointSet):
+            coordinates = zip(points.x.tolist(), points.y.tolist())
+        else:
+            coordinates = ((point.x, point.y) for point in points)
+        for x, y in coordinates:
+            px = x * scale
+            py = y * scale
             canvas.create_oval(px - 1, py - 1, px + 1, py + 1, fill="gray")
 
     # Draw path if provided
@@ -1,312 +1,427 @@
-import numpy as np
-import matplotlib.pyplot as plt
+import argparse
 import heapq
-import random
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 from scipy.ndimage import label
-from scipy.spatial.distance import cdist
 
-# Ustawienie ziarna dla reprodukowalności
-# np.random.seed(42)
-# random.seed(42)
+from modules.common.summed_area_table import SummedAreaTable
+from modules.seed_selection import largest_component, select_seeds
 
 # Parametry terenu
-territory_size = 50  # 50x50 jednostek (2500 m²)
-n_field_mice = 150
-n_house_mice = 80
-n_snails = 90
-n_leaves = 300
-n_rocks = 200
+TERRITORY_SIZE = 50  # 50x50 jednostek (2500 m²)
+GRID_SIZE = 50       # siatka 50x50 komórek
+
+OBJECTS_COUNT = {
+    'field_mice': 150,
+    'house_mice': 80,
+    'snails': 90,
+    'leaves': 300,
+    'rocks': 200
+}
+
+LUNA_THRESHOLD = 150    # min. liczba myszy w prostokącie Luny
+MIN_SEED_DISTANCE = 20  # min. odległość między punktami startowymi Ariany i Dantego
+
+# Etykiety regionów
+LUNA, ARIANA, DANTE = 1, 2, 3
+
+# Kolory regionów według etykiety: brak, Luna - czerwony, Ariana - zielony, Dante - niebieski
+REGION_COLORS = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=np.float64)
+
 
 # Generowanie pozycji obiektów (współrzędne ciągłe)
-field_mice = np.random.rand(n_field_mice, 2) * territory_size
-house_mice = np.random.rand(n_house_mice, 2) * territory_size
-snails = np.random.rand(n_snails, 2) * territory_size
-leaves = np.random.rand(n_leaves, 2) * territory_size
-rocks = np.random.rand(n_rocks, 2) * territory_size
+def generate_objects(territory_size: float = TERRITORY_SIZE, counts: dict = None, rng=None) -> dict[str, np.ndarray]:
+    """
+    Random (n, 2) positions of every object type. Without `rng` the global
+    np.random state is used (np.random.seed works as before); otherwise
+    `rng` is a seed or a np.random.Generator.
+    """
+    counts = OBJECTS_COUNT if counts is None else counts
+    random = np.random if rng is None else np.random.default_rng(rng)
+    return {name: random.random((count, 2)) * territory_size for name, count in counts.items()}
 
-# Tworzenie siatki 50x50
-size = 50
-n_cells = size * size
 
 # Przypisanie obiektów do komórek siatki
-def assign_to_grid(positions, grid_size):
-    grid = np.zeros((grid_size, grid_size), dtype=int)
-    for pos in positions:
-        x, y = pos
-        i = min(int(y), grid_size - 1)
-        j = min(int(x), grid_size - 1)
-        grid[i, j] += 1
-    return grid
-
-mice_grid = assign_to_grid(field_mice, size) + assign_to_grid(house_mice, size)
-snails_grid = assign_to_grid(snails, size)
-leaves_grid = assign_to_grid(leaves, size)
-rocks_grid = assign_to_grid(rocks, size)
-
-# Łączenie liści i kamieni dla Dantego
-dante_grid = leaves_grid + rocks_grid
-
-# Znajdowanie prostokąta Luny (dotykającego granicy z min. 150 myszami)
-rectangles = []
-
-# Górna granica (i1=0)
-for i2 in range(size):
-    for j1 in range(size):
-        for j2 in range(j1, size):
-            mice_sum = mice_grid[0:i2+1, j1:j2+1].sum()
-            if mice_sum >= 150:
-                area = (i2+1) * (j2 - j1 + 1)
-                rectangles.append(('top', 0, j1, i2, j2, area, mice_sum))
-
-# Dolna granica (i2=size-1)
-for i1 in range(size):
-    for j1 in range(size):
-        for j2 in range(j1, size):
-            mice_sum = mice_grid[i1:size, j1:j2+1].sum()
-            if mice_sum >= 150:
-                area = (size - i1) * (j2 - j1 + 1)
-                rectangles.append(('bottom', i1, j1, size-1, j2, area, mice_sum))
-
-# Lewa granica (j1=0)
-for j2 in range(size):
-    for i1 in range(size):
-        for i2 in range(i1, size):
-            mice_sum = mice_grid[i1:i2+1, 0:j2+1].sum()
-            if mice_sum >= 150:
-                area = (i2 - i1 + 1) * (j2+1)
-                rectangles.append(('left', i1, 0, i2, j2, area, mice_sum))
-
-# Prawa granica (j2=size-1)
-for j1 in range(size):
-    for i1 in range(size):
-        for i2 in range(i1, size):
-            mice_sum = mice_grid[i1:i2+1, j1:size].sum()
-            if mice_sum >= 150:
-                area = (i2 - i1 + 1) * (size - j1)
-                rectangles.append(('right', i1, j1, i2, size-1, area, mice_sum))
-
-if not rectangles:
-    raise RuntimeError("Nie znaleziono odpowiedniego prostokąta dla Luny.")
-
-# Wybór prostokąta o najmniejszym obszarze
-rectangles.sort(key=lambda x: (x[5], -x[6]))
-border_type, i1, j1, i2, j2, area, mice_sum = rectangles[0]
-
-# Inicjalizacja etykiet regionów
-labels = np.zeros((size, size), dtype=int)
-
-# Przypisanie prostokąta Luny
-if border_type == 'top':
-    labels[0:i2+1, j1:j2+1] = 1
-elif border_type == 'bottom':
-    labels[i1:size, j1:j2+1] = 1
-elif border_type == 'left':
-    labels[i1:i2+1, 0:j2+1] = 1
-elif border_type == 'right':
-    labels[i1:i2+1, j1:size] = 1
-
-# Znajdowanie pozostałych komórek
-remaining_indices = np.argwhere(labels == 0)
-
-# Znajdowanie największego spójnego obszaru
-remaining_grid = (labels == 0).astype(int)
-labeled, num_features = label(remaining_grid)
-
-# Wybór największego spójnego obszaru
-largest_component = None
-max_size = 0
-for i in range(1, num_features + 1):
-    component_size = np.sum(labeled == i)
-    if component_size > max_size:
-        max_size = component_size
-        largest_component = (labeled == i)
-
-if largest_component is None:
-    raise RuntimeError("Brak spójnego obszaru dla Ariany i Dantego")
-
-# Znajdowanie punktów startowych w odległości od siebie
-indices_in_component = np.argwhere(largest_component)
-
-# Wybór punktu startowego Ariany - komórka z największą liczbą ślimaków
-seedA = None
-max_snails = -1
-for idx in indices_in_component:
-    i, j = idx
-    if snails_grid[i, j] > max_snails:
-        max_snails = snails_grid[i, j]
-        seedA = (i, j)
-
-# Wybór punktu startowego Dantego - komórka z największą liczbą liści i kamieni, w odległości min. 20 komórek
-seedD = None
-max_dante = -1
-min_distance = 20  # Minimalna odległość między punktami startowymi
-
-for idx in indices_in_component:
-    i, j = idx
-    dist = np.sqrt((i - seedA[0])**2 + (j - seedA[1])**2)
-    if dist >= min_distance and dante_grid[i, j] > max_dante:
-        max_dante = dante_grid[i, j]
-        seedD = (i, j)
-
-# Jeśli nie znaleziono odpowiedniego punktu dla Dantego, wybierz drugi najlepszy bez ograniczenia odległości
-if seedD is None:
-    max_dante = -1
-    for idx in indices_in_component:
-        i, j = idx
-        if dante_grid[i, j] > max_dante and (i, j) != seedA:
-            max_dante = dante_grid[i, j]
-            seedD = (i, j)
-
-# Przypisanie punktów startowych
-labels[seedA] = 2
-labels[seedD] = 3
-
-# Inicjalizacja kolejek priorytetowych
-heapA = []
-heapD = []
-dirs = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-
-# Funkcja dodająca sąsiadów do kolejki
-def add_neighbors(heap, cell, grid, labels, region_id):
-    i, j = cell
-    for di, dj in dirs:
-        ni, nj = i + di, j + dj
-        if 0 <= ni < size and 0 <= nj < size:
-            if largest_component[ni, nj] and labels[ni, nj] == 0:
-                heapq.heappush(heap, (-grid[ni, nj], ni, nj))
-
-# Inicjalizacja kolejek
-add_neighbors(heapA, seedA, snails_grid, labels, 2)
-add_neighbors(heapD, seedD, dante_grid, labels, 3)
-
-# Liczba komórek do przydzielenia w obszarze
-total_to_assign = np.sum(largest_component) - 2
-assigned_count = 0
-
-# Statystyki regionów
-sizeA = 1
-sizeD = 1
-
-# Równoważone przydzielanie komórek z uwzględnieniem rozmiaru regionów
-while assigned_count < total_to_assign:
-    # Wybór regionu do rozszerzenia na podstawie rozmiaru
-    if sizeA <= sizeD and heapA:
-        # Rozszerzanie regionu Ariany
-        neg_val, i, j = heapq.heappop(heapA)
-        if labels[i, j] == 0:
-            labels[i, j] = 2
-            assigned_count += 1
-            sizeA += 1
-            add_neighbors(heapA, (i, j), snails_grid, labels, 2)
-    elif heapD:
-        # Rozszerzanie regionu Dantego
-        neg_val, i, j = heapq.heappop(heapD)
-        if labels[i, j] == 0:
-            labels[i, j] = 3
-            assigned_count += 1
-            sizeD += 1
-            add_neighbors(heapD, (i, j), dante_grid, labels, 3)
-    
-    # Jeśli kolejki są puste, ale są jeszcze komórki do przydzielenia
-    if not heapA and not heapD and assigned_count < total_to_assign:
-        # Znajdź pierwszą nieprzydzieloną komórkę
-        for idx in indices_in_component:
-            i, j = idx
-            if labels[i, j] == 0:
-                # Przydziel do regionu z mniejszą liczbą komórek
-                if sizeA <= sizeD:
-                    labels[i, j] = 2
-                    assigned_count += 1
-                    sizeA += 1
-                    add_neighbors(heapA, (i, j), snails_grid, labels, 2)
-                else:
-                    labels[i, j] = 3
-                    assigned_count += 1
-                    sizeD += 1
-                    add_neighbors(heapD, (i, j), dante_grid, labels, 3)
-                break
-
-# Tworzenie wizualizacji
-plt.figure(figsize=(15, 12))
-
-# 1. Wizualizacja podziału terytorium
-color_grid = np.zeros((size, size, 3))
-for i in range(size):
-    for j in range(size):
-        if labels[i, j] == 1:
-            color_grid[i, j] = [1, 0, 0]  # Luna - czerwony
-        elif labels[i, j] == 2:
-            color_grid[i, j] = [0, 1, 0]  # Ariana - zielony
-        elif labels[i, j] == 3:
-            color_grid[i, j] = [0, 0, 1]  # Dante - niebieski
-
-# Wyświetlenie siatki z przeźroczystością
-plt.imshow(color_grid, extent=[0, territory_size, 0, territory_size], 
-           origin='lower', alpha=0.3, aspect='auto')
-
-# 2. Dodanie kolorowych kropek reprezentujących obiekty
-plt.scatter(field_mice[:, 0], field_mice[:, 1], s=30, c='#2E8B57', alpha=0.8, label='Myszy polne (150)')
-plt.scatter(house_mice[:, 0], house_mice[:, 1], s=30, c='#4169E1', alpha=0.8, label='Myszy domowe (80)')
-plt.scatter(snails[:, 0], snails[:, 1], s=25, c='#8B4513', alpha=0.7, label='Ślimaki (90)')
-plt.scatter(leaves[:, 0], leaves[:, 1], s=15, c='#32CD32', alpha=0.5, label='Liście (300)')
-plt.scatter(rocks[:, 0], rocks[:, 1], s=20, c='#708090', alpha=0.6, label='Kamyki (200)')
-
-# 4. Konfiguracja wykresu
-plt.title('Zrównoważony podział terytorium dla wszystkich kotów', fontsize=16)
-plt.xlabel('X (m)', fontsize=14)
-plt.ylabel('Y (m)', fontsize=14)
-plt.xticks(np.arange(0, territory_size+1, 5))
-plt.yticks(np.arange(0, territory_size+1, 5))
-plt.grid(True, linestyle='--', alpha=0.3)
-plt.legend(loc='upper right', fontsize=12)
-
-# 5. Dodanie siatki pomocniczej
-for x in range(0, territory_size+1, 5):
-    plt.axvline(x=x, color='gray', linestyle='--', alpha=0.2)
-for y in range(0, territory_size+1, 5):
-    plt.axhline(y=y, color='gray', linestyle='--', alpha=0.2)
-
-# 6. Obliczenie i wyświetlenie wyników
-luna_mice = np.sum(mice_grid * (labels == 1))
-luna_score = luna_mice / 230.0
-
-ariana_snails = np.sum(snails_grid * (labels == 2))
-ariana_score = ariana_snails / 90.0
-
-dante_leaves = np.sum(leaves_grid * (labels == 3))
-dante_rocks = np.sum(rocks_grid * (labels == 3))
-dante_score = (dante_leaves + dante_rocks) / 500.0
-
-# Obliczenie powierzchni regionów
-area_luna = np.sum(labels == 1)
-area_ariana = np.sum(labels == 2)
-area_dante = np.sum(labels == 3)
-total_area = size * size
-
-plt.figtext(0.5, 0.01, 
-            f"Wyniki: Luna: {luna_score:.2f} (myszy: {luna_mice}/230, obszar: {area_luna}/{total_area}) | "
-            f"Ariana: {ariana_score:.2f} (ślimaki: {ariana_snails}/90, obszar: {area_ariana}/{total_area}) | "
-            f"Dante: {dante_score:.2f} (liście+kamienie: {dante_leaves + dante_rocks}/500, obszar: {area_dante}/{total_area})", 
-            ha="center", fontsize=12, bbox={"facecolor":"orange", "alpha":0.2, "pad":5})
-
-plt.tight_layout()
-plt.subplots_adjust(bottom=0.1)
-plt.show()
-
-# Dodatkowa analiza równości podziału
-print("\nAnaliza równości podziału:")
-print(f"Obszar Luny: {area_luna} komórek ({area_luna/total_area*100:.1f}%)")
-print(f"Obszar Ariany: {area_ariana} komórek ({area_ariana/total_area*100:.1f}%)")
-print(f"Obszar Dantego: {area_dante} komórek ({area_dante/total_area*100:.1f}%)")
-print(f"Różnica między największym a najmniejszym regionem: "
-      f"{max(area_ariana, area_dante) - min(area_ariana, area_dante)} komórek")
+def assign_to_grid(positions: np.ndarray, grid_size: int, cell_size: float = 1.0) -> np.ndarray:
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    i = np.minimum((positions[:, 1] / cell_size).astype(np.int64), grid_size - 1)
+    j = np.minimum((positions[:, 0] / cell_size).astype(np.int64), grid_size - 1)
+    counts = np.bincount(i * grid_size + j, minlength=grid_size * grid_size)
+    return counts.reshape(grid_size, grid_size)
+
+
+BORDER_SIDES = ('top', 'bottom', 'left', 'right')
+
+
+def _first_reaching(prefix: np.ndarray, threshold) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    For every row d and start s of `prefix` (rows are non-decreasing prefix
+    sums), the smallest end e > s with prefix[d, e] - prefix[d, s] >= threshold.
+    Returns the (d, s, e) triples that have one, in row-major order.
+    """
+    n_rows, length = prefix.shape
+    # Przesunięcie wierszy tak, by spłaszczona tablica była posortowana,
+    # a cel z jednego wiersza nie trafiał w zakres następnego
+    span = prefix[:, -1].max() - prefix[:, 0].min() + abs(threshold) + 1
+    offsets = (np.arange(n_rows) * span)[:, None]
+
+    flat = (prefix + offsets).ravel()
+    targets = prefix[:, :-1] + threshold + offsets
+    found = np.searchsorted(flat, targets.ravel()).reshape(n_rows, length - 1)
+    ends = found - np.arange(n_rows)[:, None] * length
+
+    rows, starts = np.nonzero(ends < length)
+    ends = np.maximum(ends[rows, starts], starts + 1)
+    return rows, starts, ends
+
+
+def find_border_rectangle(grid: np.ndarray, threshold) -> tuple | None:
+    """
+    Smallest-area rectangle touching the grid border whose cells sum to at
+    least `threshold` (ties: larger sum, then sides in order top, bottom,
+    left, right). Returns (side, i1, j1, i2, j2, area, total) with
+    inclusive bounds, or None.
+
+    For a fixed side, depth and start only the shortest rectangle reaching
+    the threshold can be the smallest, so each side is one searchsorted
+    over prefix sums taken from a summed-area table: O(n² log n).
+    """
+    n_rows, n_cols = grid.shape
+    t = SummedAreaTable(grid).table
+
+    # Dla każdego boku: sumy prefiksowe wzdłuż boku dla każdej głębokości
+    prefixes = {
+        'top': t[1:, :],                                  # wiersz i2, wzdłuż j
+        'bottom': t[n_rows] - t[:n_rows, :],              # wiersz i1, wzdłuż j
+        'left': t[:, 1:].T,                               # kolumna j2, wzdłuż i
+        'right': (t[:, n_cols][:, None] - t[:, :n_cols]).T,  # kolumna j1, wzdłuż i
+    }
+
+    best = None
+    for side in BORDER_SIDES:
+        prefix = np.ascontiguousarray(prefixes[side])
+        depth, start, end = _first_reaching(prefix, threshold)
+        if len(depth) == 0:
+            continue
+
+        if side == 'top' or side == 'left':
+            depth_len = depth + 1
+        else:
+            depth_len = prefix.shape[0] - depth
+        areas = depth_len * (end - start)
+        totals = prefix[depth, end] - prefix[depth, start]
+
+        smallest = np.flatnonzero(areas == areas.min())
+        pick = smallest[np.argmax(totals[smallest])]
+        area, total = int(areas[pick]), totals[pick].item()
+        if best is not None and (best[5], -best[6]) <= (area, -total):
+            continue
+
+        d, s, e = int(depth[pick]), int(start[pick]), int(end[pick]) - 1
+        if side == 'top':
+            best = (side, 0, s, d, e, area, total)
+        elif side == 'bottom':
+            best = (side, d, s, n_rows - 1, e, area, total)
+        elif side == 'left':
+            best = (side, s, 0, e, d, area, total)
+        else:
+            best = (side, s, d, e, n_cols - 1, area, total)
+
+    return best
+
+
+def _grow_regions(labels: np.ndarray, component: np.ndarray, seedA: tuple, seedD: tuple,
+                  snails_grid: np.ndarray, dante_grid: np.ndarray):
+    """
+    Balanced region growing of Ariana (from seedA) and Dante (from seedD)
+    over `component`; the smaller region grows by its most valuable
+    frontier cell (ties: lowest row, then column).
+
+    Cells are flat indices. Every heap holds a cell at most once (in-heap
+    bitmaps) as a single int key, and cells labelled by the other region
+    are dropped lazily from the top. When both frontiers are empty, the
+    next unassigned cell in row-major order is found with a pointer that
+    only moves forward.
+    """
+    n_rows, n_cols = labels.shape
+    n = n_rows * n_cols
+
+    # Listy/bytearray zamiast indeksowania tablic NumPy element po elemencie
+    flat = labels.reshape(-1)
+    assigned = bytearray(flat != 0)
+    free = bytearray(component.reshape(-1) & (flat == 0))
+    values = {ARIANA: snails_grid.reshape(-1).tolist(), DANTE: dante_grid.reshape(-1).tolist()}
+    # Klucz w kopcu: (max - wartość) * n + indeks - porządek jak dla krotek (-wartość, i, j)
+    top = {region: max(v) if v else 0 for region, v in values.items()}
+    in_heap = {ARIANA: bytearray(n), DANTE: bytearray(n)}
+    heaps = {ARIANA: [], DANTE: []}
+    sizes = {ARIANA: 1, DANTE: 1}
+    owner = bytearray(n)
+
+    def assign(p, region):
+        assigned[p] = 1
+        free[p] = 0
+        owner[p] = region
+
+        heap, seen, value, high = heaps[region], in_heap[region], values[region], top[region]
+        row, col = divmod(p, n_cols)
+        for q, inside in ((p + 1, col + 1 < n_cols), (p + n_cols, row + 1 < n_rows),
+                          (p - 1, col > 0), (p - n_cols, row > 0)):
+            if inside and free[q] and not seen[q]:
+                seen[q] = 1
+                heapq.heappush(heap, (high - value[q]) * n + q)
+
+    seedA_flat = seedA[0] * n_cols + seedA[1]
+    seedD_flat = seedD[0] * n_cols + seedD[1]
+    assigned[seedA_flat] = assigned[seedD_flat] = 1
+    free[seedA_flat] = free[seedD_flat] = 0
+    assign(seedA_flat, ARIANA)
+    assign(seedD_flat, DANTE)
+
+    remaining = sum(free)
+    cells = np.flatnonzero(free).tolist()
+    next_cell = 0
+    heapA, heapD = heaps[ARIANA], heaps[DANTE]
+
+    # Równoważone przydzielanie komórek z uwzględnieniem rozmiaru regionów
+    while remaining > 0:
+        while heapA and assigned[heapA[0] % n]:
+            heapq.heappop(heapA)
+        while heapD and assigned[heapD[0] % n]:
+            heapq.heappop(heapD)
+
+        if heapA and (sizes[ARIANA] <= sizes[DANTE] or not heapD):
+            region, p = ARIANA, heapq.heappop(heapA) % n
+        elif heapD:
+            region, p = DANTE, heapq.heappop(heapD) % n
+        else:
+            # Kolejki puste - pierwsza nieprzydzielona komórka, do mniejszego regionu
+            while assigned[cells[next_cell]]:
+                next_cell += 1
+            p = cells[next_cell]
+            region = ARIANA if sizes[ARIANA] <= sizes[DANTE] else DANTE
+
+        assign(p, region)
+        sizes[region] += 1
+        remaining -= 1
+
+    grown = np.frombuffer(owner, dtype=np.uint8)
+    flat[grown != 0] = grown[grown != 0]
+
+
+def partition_territory(objects: dict[str, np.ndarray], size: int = GRID_SIZE,
+                        territory_size: float = TERRITORY_SIZE,
+                        luna_threshold: float = LUNA_THRESHOLD,
+                        min_seed_distance: float = MIN_SEED_DISTANCE) -> dict:
+    """
+    Splits a `size` x `size` grid over the territory between the cats:
+    Luna gets the smallest border rectangle with at least `luna_threshold`
+    mice, Ariana (snails) and Dante (leaves and rocks) grow balanced
+    regions over the largest connected remainder.
+
+    Returns a dict with `labels` (0 = nobody, LUNA, ARIANA, DANTE), the
+    `grids` of object counts, Luna's `rectangle`, the `seeds`, and the
+    per-cat `counts`, `scores` (fraction of their objects) and `areas`.
+    """
+    cell_size = territory_size / size
+    grids = {name: assign_to_grid(positions, size, cell_size) for name, positions in objects.items()}
+    mice_grid = grids['field_mice'] + grids['house_mice']
+    snails_grid = grids['snails']
+    # Łączenie liści i kamieni dla Dantego
+    dante_grid = grids['leaves'] + grids['rocks']
+
+    # Prostokąt Luny (dotykający granicy z min. `luna_threshold` myszami)
+    rectangle = find_border_rectangle(mice_grid, luna_threshold)
+    if rectangle is None:
+        raise RuntimeError("Nie znaleziono odpowiedniego prostokąta dla Luny.")
+    _, i1, j1, i2, j2, _, _ = rectangle
+
+    labels = np.zeros((size, size), dtype=int)
+    labels[i1:i2+1, j1:j2+1] = LUNA
+
+    # Największy spójny obszar z pozostałych komórek
+    component = largest_component(labels == 0)
+    if component is None:
+        raise RuntimeError("Brak spójnego obszaru dla Ariany i Dantego")
+
+    seedA, seedD = select_seeds(component, [snails_grid, dante_grid], min_seed_distance)
+    _grow_regions(labels, component, seedA, seedD, snails_grid, dante_grid)
+
+    # Sumy obiektów i powierzchnie wszystkich regionów naraz (bincount po etykietach)
+    flat_labels = labels.ravel()
+    region_areas = np.bincount(flat_labels, minlength=4)
+    counts = {
+        'Luna': int(np.bincount(flat_labels, weights=mice_grid.ravel(), minlength=4)[LUNA]),
+        'Ariana': int(np.bincount(flat_labels, weights=snails_grid.ravel(), minlength=4)[ARIANA]),
+        'Dante': int(np.bincount(flat_labels, weights=dante_grid.ravel(), minlength=4)[DANTE]),
+    }
+    totals = {
+        'Luna': int(mice_grid.sum()),
+        'Ariana': int(snails_grid.sum()),
+        'Dante': int(dante_grid.sum()),
+    }
+    areas = {
+        'Luna': int(region_areas[LUNA]),
+        'Ariana': int(region_areas[ARIANA]),
+        'Dante': int(region_areas[DANTE]),
+    }
+
+    return {
+        'labels': labels,
+        'grids': grids,
+        'rectangle': rectangle,
+        'seeds': (seedA, seedD),
+        'counts': counts,
+        'totals': totals,
+        'scores': {cat: counts[cat] / totals[cat] if totals[cat] else 0.0 for cat in counts},
+        'areas': areas
+    }
+
 
 # Sprawdzenie spójności regionów
-def check_connectivity(region_mask):
+def check_connectivity(region_mask: np.ndarray) -> bool:
     labeled, num_features = label(region_mask)
     return num_features == 1
 
-print("\nSpójność regionów:")
-print(f"Luna: {'spójny' if check_connectivity(labels == 1) else 'NIESPÓJNY!'}")
-print(f"Ariana: {'spójny' if check_connectivity(labels == 2) else 'NIESPÓJNY!'}")
-print(f"Dante: {'spójny' if check_connectivity(labels == 3) else 'NIESPÓJNY!'}")
\ No newline at end of file
+
+def _run_scenario(seed, params: dict) -> dict | None:
+    """One batch scenario: scores and areas only (labels are not sent back), None if it failed."""
+    objects = generate_objects(params.get('territory_size', TERRITORY_SIZE), rng=seed)
+    try:
+        result = partition_territory(objects, **params)
+    except RuntimeError:
+        return None
+    return {'scores': result['scores'], 'areas': result['areas']}
+
+
+def run_batch(seeds, workers: int = None, **params) -> dict:
+    """
+    Runs partition_territory on random territories, one per seed, in
+    parallel worker processes, and aggregates the per-cat scores and
+    areas (mean, std, min, max). `params` are passed to partition_territory.
+    Scenarios without a valid partition are counted in `failed`.
+    """
+    seeds = list(seeds)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(seeds) // (workers * 4))
+
+    if workers == 1:
+        results = [_run_scenario(seed, params) for seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_scenario, seeds, [params] * len(seeds), chunksize=chunksize))
+
+    done = [result for result in results if result is not None]
+    stats = {'runs': len(seeds), 'failed': len(seeds) - len(done)}
+    for key in ('scores', 'areas'):
+        stats[key] = {}
+        for cat in ('Luna', 'Ariana', 'Dante'):
+            values = np.array([result[key][cat] for result in done], dtype=np.float64)
+            stats[key][cat] = {
+                'mean': float(values.mean()) if len(values) else float('nan'),
+                'std': float(values.std()) if len(values) else float('nan'),
+                'min': float(values.min()) if len(values) else float('nan'),
+                'max': float(values.max()) if len(values) else float('nan'),
+            }
+    return stats
+
+
+def plot_partition(objects: dict[str, np.ndarray], result: dict, territory_size: float = TERRITORY_SIZE):
+    import matplotlib.pyplot as plt
+
+    labels = result['labels']
+    counts, totals, areas, scores = result['counts'], result['totals'], result['areas'], result['scores']
+    total_area = labels.size
+
+    plt.figure(figsize=(15, 12))
+
+    # 1. Wizualizacja podziału terytorium
+    color_grid = REGION_COLORS[labels]
+
+    # Wyświetlenie siatki z przeźroczystością
+    plt.imshow(color_grid, extent=[0, territory_size, 0, territory_size],
+               origin='lower', alpha=0.3, aspect='auto')
+
+    # 2. Dodanie kolorowych kropek reprezentujących obiekty
+    field_mice, house_mice = objects['field_mice'], objects['house_mice']
+    snails, leaves, rocks = objects['snails'], objects['leaves'], objects['rocks']
+    plt.scatter(field_mice[:, 0], field_mice[:, 1], s=30, c='#2E8B57', alpha=0.8, label=f'Myszy polne ({len(field_mice)})')
+    plt.scatter(house_mice[:, 0], house_mice[:, 1], s=30, c='#4169E1', alpha=0.8, label=f'Myszy domowe ({len(house_mice)})')
+    plt.scatter(snails[:, 0], snails[:, 1], s=25, c='#8B4513', alpha=0.7, label=f'Ślimaki ({len(snails)})')
+    plt.scatter(leaves[:, 0], leaves[:, 1], s=15, c='#32CD32', alpha=0.5, label=f'Liście ({len(leaves)})')
+    plt.scatter(rocks[:, 0], rocks[:, 1], s=20, c='#708090', alpha=0.6, label=f'Kamyki ({len(rocks)})')
+
+    # 3. Konfiguracja wykresu
+    plt.title('Zrównoważony podział terytorium dla wszystkich kotów', fontsize=16)
+    plt.xlabel('X (m)', fontsize=14)
+    plt.ylabel('Y (m)', fontsize=14)
+    plt.xticks(np.arange(0, territory_size+1, 5))
+    plt.yticks(np.arange(0, territory_size+1, 5))
+    plt.grid(True, linestyle='--', alpha=0.3)
+    plt.legend(loc='upper right', fontsize=12)
+
+    # 4. Dodanie siatki pomocniczej
+    for x in range(0, int(territory_size)+1, 5):
+        plt.axvline(x=x, color='gray', linestyle='--', alpha=0.2)
+    for y in range(0, int(territory_size)+1, 5):
+        plt.axhline(y=y, color='gray', linestyle='--', alpha=0.2)
+
+    # 5. Wyniki
+    plt.figtext(0.5, 0.01,
+                f"Wyniki: Luna: {scores['Luna']:.2f} (myszy: {counts['Luna']}/{totals['Luna']}, obszar: {areas['Luna']}/{total_area}) | "
+                f"Ariana: {scores['Ariana']:.2f} (ślimaki: {counts['Ariana']}/{totals['Ariana']}, obszar: {areas['Ariana']}/{total_area}) | "
+                f"Dante: {scores['Dante']:.2f} (liście+kamienie: {counts['Dante']}/{totals['Dante']}, obszar: {areas['Dante']}/{total_area})",
+                ha="center", fontsize=12, bbox={"facecolor":"orange", "alpha":0.2, "pad":5})
+
+    plt.tight_layout()
+    plt.subplots_adjust(bottom=0.1)
+    plt.show()
+
+
+def print_analysis(result: dict):
+    labels, areas = result['labels'], result['areas']
+    total_area = labels.size
+    area_ariana, area_dante = areas['Ariana'], areas['Dante']
+
+    # Dodatkowa analiza równości podziału
+    print("\nAnaliza równości podziału:")
+    print(f"Obszar Luny: {areas['Luna']} komórek ({areas['Luna']/total_area*100:.1f}%)")
+    print(f"Obszar Ariany: {area_ariana} komórek ({area_ariana/total_area*100:.1f}%)")
+    print(f"Obszar Dantego: {area_dante} komórek ({area_dante/total_area*100:.1f}%)")
+    print(f"Różnica między największym a najmniejszym regionem: "
+          f"{max(area_ariana, area_dante) - min(area_ariana, area_dante)} komórek")
+
+    print("\nSpójność regionów:")
+    print(f"Luna: {'spójny' if check_connectivity(labels == LUNA) else 'NIESPÓJNY!'}")
+    print(f"Ariana: {'spójny' if check_connectivity(labels == ARIANA) else 'NIESPÓJNY!'}")
+    print(f"Dante: {'spójny' if check_connectivity(labels == DANTE) else 'NIESPÓJNY!'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Podział terytorium między koty")
+    parser.add_argument('--batch', type=int, default=0, help="liczba losowych scenariuszy (bez wykresu)")
+    parser.add_argument('--seed', type=int, default=None, help="ziarno (pierwsze ziarno w trybie wsadowym)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--size', type=int, default=GRID_SIZE, help="rozmiar siatki")
+    args = parser.parse_args()
+
+    if args.batch:
+        first = args.seed or 0
+        stats = run_batch(range(first, first + args.batch), workers=args.workers, size=args.size)
+        print(f"Scenariusze: {stats['runs']}, nieudane: {stats['failed']}")
+        for cat, s in stats['scores'].items():
+            area = stats['areas'][cat]
+            print(f"{cat}: wynik {s['mean']:.3f} ± {s['std']:.3f} (min {s['min']:.3f}, max {s['max']:.3f}), "
+                  f"obszar {area['mean']:.1f} ± {area['std']:.1f}")
+        return
+
+    objects = generate_objects(rng=args.seed)
+    result = partition_territory(objects, size=args.size)
+    plot_partition(objects, result)
+    print_analysis(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# Moduły są importowane jak w run.py - z katalogu src
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
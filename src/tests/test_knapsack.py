@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+import modules.knapsack as knapsack
+from modules.knapsack import solve_knapsack
+
+
+def reference(volumes, values, capacity, bounds):
+    """Plain DP over item copies: best value and the smallest volume reaching it."""
+    best = np.full(capacity + 1, -np.inf)
+    best[0] = 0.0
+    for volume, value, bound in zip(volumes, values, bounds):
+        for _ in range(bound if bound is not None else capacity // volume):
+            for j in range(capacity, volume - 1, -1):
+                best[j] = max(best[j], best[j - volume] + value)
+    top = best.max()
+    return top, int(np.flatnonzero(np.isclose(best, top, rtol=0, atol=1e-9))[0])
+
+
+def cases(seed, count):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        n = int(rng.integers(1, 6))
+        volumes = rng.integers(1, 15, n)
+        values = rng.integers(0, 20, n).astype(float)
+        capacity = int(rng.integers(0, 60))
+        yield volumes, values, capacity, rng.integers(0, 4, n)
+
+
+@pytest.fixture(params=[True, False], ids=["c", "numpy"])
+def use_c(request, monkeypatch):
+    if request.param and not knapsack.USE_C_IMPLEMENTATION:
+        pytest.skip("C knapsack library not available")
+    monkeypatch.setattr(knapsack, "USE_C_IMPLEMENTATION", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("low_memory", [False, True])
+@pytest.mark.parametrize("seed, kind", [(1, "unbounded"), (2, "binary"), (3, "bounded")])
+def test_matches_reference_dp(use_c, low_memory, seed, kind):
+    for volumes, values, capacity, limits in cases(seed, 40):
+        if kind == "unbounded":
+            bounds, per_item = None, [None] * len(volumes)
+        elif kind == "binary":
+            bounds, per_item = 1, [1] * len(volumes)
+        else:
+            bounds, per_item = limits, list(limits)
+
+        result = solve_knapsack(volumes, values, capacity, bounds=bounds, low_memory=low_memory)
+        value, volume = reference(volumes, values, capacity, per_item)
+
+        counts = result["counts"]
+        assert result["value"] == pytest.approx(value)
+        assert result["volume"] == volume
+        assert int(np.dot(counts, volumes)) == volume <= capacity
+        assert float(np.dot(counts, values)) == pytest.approx(value)
+        if bounds is not None:
+            assert (counts <= np.asarray(per_item)).all()
+
+
+@pytest.mark.parametrize("low_memory", [False, True])
+def test_several_cats_share_capacity(use_c, low_memory):
+    volumes = np.array([3, 5, 7, 11])
+    values = np.array([[4.0, 6.0, 9.0, 13.0], [1.0, 8.0, 2.0, 20.0]])
+    result = solve_knapsack(volumes, values, 40, bounds=2, low_memory=low_memory)
+    for cat in range(len(values)):
+        value, volume = reference(volumes, values[cat], 40, [2] * len(volumes))
+        assert result["value"][cat] == pytest.approx(value)
+        assert result["volume"][cat] == volume
+        assert float(np.dot(result["counts"][cat], values[cat])) == pytest.approx(value)
+
+
+@pytest.mark.filterwarnings("error")
+@pytest.mark.parametrize("low_memory", [False, True])
+def test_float_values_without_warnings(use_c, low_memory):
+    # Wartości z wieloma miejscami po przecinku idą ścieżką float64 (-inf dla nieosiągalnych)
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        volumes = rng.integers(3, 40, 6)
+        values = rng.random(6) * 10
+        result = solve_knapsack(volumes, values, 300, low_memory=low_memory)
+        value, _ = reference(volumes, values, 300, [None] * 6)
+        assert result["value"] == pytest.approx(value)
+        assert float(np.dot(result["counts"], values)) == pytest.approx(result["value"])
+        assert int(np.dot(result["counts"], volumes)) == result["volume"] <= 300
@@ -0,0 +1,80 @@
+import io
+import contextlib
+
+import numpy as np
+import pytest
+
+from modules.common.map import Map, convert_text_to_binary
+from modules.common.point_set import PointSet
+from modules.custers import create_clusters
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    return PointSet(rng.integers(0, 10000, 500), rng.integers(0, 10000, 500))
+
+
+def test_text_round_trip(tmp_path, points):
+    Map("m", points).save_to_file(str(tmp_path))
+    loaded = Map.load_from_file(str(tmp_path / "m.txt"))
+    assert loaded.name == "m"
+    assert loaded.points.x.tolist() == points.x.tolist()
+    assert loaded.points.y.tolist() == points.y.tolist()
+
+
+def test_text_blocks_match_whole_file(tmp_path, points):
+    Map("m", points).save_to_file(str(tmp_path))
+    whole = Map.load_from_file(str(tmp_path / "m.txt"))
+    blocks = list(Map.iter_blocks(str(tmp_path / "m.txt"), block_lines=64))
+    assert len(blocks) == 8
+    assert np.concatenate([b.x for b in blocks]).tolist() == whole.points.x.tolist()
+    assert np.concatenate([b.ids for b in blocks]).tolist() == list(range(500))
+
+
+def test_scaled_text_skips_invalid_lines(tmp_path):
+    path = tmp_path / "s.txt"
+    path.write_text("1.5 % 2.25\nbroken\n3 % 4\n")
+    loaded = Map.load_from_file(str(path), scale=100)
+    assert loaded.points.x.tolist() == [150, 300]
+    assert loaded.points.y.tolist() == [225, 400]
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_binary_round_trip(tmp_path, points, mmap):
+    path = Map("m", points).save_binary(str(tmp_path))
+    loaded = Map.load_binary(path, mmap=mmap)
+    assert loaded.points.x.tolist() == points.x.tolist()
+    assert loaded.points.y.tolist() == points.y.tolist()
+    assert loaded.cluster_ids is None
+
+
+def clusters_of(points, cluster_ids=None):
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        grid = create_clusters(points, 100, 10000, cluster_ids)
+    return grid, out.getvalue()
+
+
+def test_binary_cluster_ids_match_text_path(tmp_path, points):
+    source = tmp_path / "m.txt"
+    Map("m", points).save_to_file(str(tmp_path))
+    # Punkty poza mapą (także taki, którego numer klastra trafiłby do następnego wiersza)
+    with open(source, "a") as file:
+        file.write("10050 % 0\n-3 % 40\n150 % 10000\n")
+
+    text = Map.load_from_file(str(source))
+    binary = Map.load_binary(convert_text_to_binary(str(source), cluster_size=100, map_size=10000))
+    assert binary.cluster_ids[-3:].tolist() == [-1, -1, -1]
+
+    from_text, text_log = clusters_of(text.points)
+    from_binary, binary_log = clusters_of(binary.points, binary.cluster_ids)
+    assert from_binary.counts.tolist() == from_text.counts.tolist()
+    assert from_binary.counts.sum() == 500
+    assert binary_log == text_log
+
+
+def test_binary_rejects_other_files(tmp_path):
+    path = tmp_path / "x.bin"
+    path.write_bytes(b"nope" * 8)
+    with pytest.raises(ValueError):
+        Map.load_binary(str(path))
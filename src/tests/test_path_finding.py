@@ -0,0 +1,111 @@
+import io
+import contextlib
+
+import numpy as np
+import pytest
+
+from modules.common.distance_oracle import DENSE_LIMIT
+from modules.common.map import Map
+from modules.common.point_set import PointSet
+from modules.custers import run, get_clusters_from_ids, get_all_points_in_clusters
+from modules.path_finding import PathFinding, PathFindingSession
+
+
+def quiet(call, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return call(*args, **kwargs)
+
+
+def random_points(seed, n):
+    rng = np.random.default_rng(seed)
+    return PointSet(rng.integers(0, 10000, n), rng.integers(0, 10000, n))
+
+
+def assert_valid_path(path, finder, size):
+    assert len(path.points) == size
+    assert path.points[0] == finder.start and path.points[-1] == finder.end
+    assert len({(p.x, p.y, p.id) for p in path.points}) == size
+
+
+def test_aco_on_run_sized_selection():
+    # Jak run.py: klastry wokół początku i końca na mapie 20k punktów - selekcja powyżej DENSE_LIMIT
+    points = random_points(0, 20000)
+    start, end = points.point(0), points.point(123)
+    clusters, selected = quiet(run, points, start, end, cluster_size=100, map_size=10000, k=100)
+    selection = get_all_points_in_clusters(get_clusters_from_ids(clusters, selected))
+
+    finder = PathFinding(selection, start, end, k=100)
+    assert len(finder.nodes) > DENSE_LIMIT and not finder.oracle.dense
+    path = quiet(finder.aco_path, num_ants=5, num_iterations=2, use_c_tours=True, seed=1)
+    assert_valid_path(path, finder, 102)
+    assert finder.aco_stats['stop'] == 'iterations'
+
+
+@pytest.fixture
+def finder():
+    points = random_points(1, 1500)
+    return PathFinding(points, points.point(0), points.point(1), k=30, candidate_list_size=10, dense_limit=500)
+
+
+def test_greedy_and_local_search(finder):
+    greedy = quiet(finder.greedy_path)
+    improved = quiet(finder.greedy_path, local_search=True)
+    assert_valid_path(greedy, finder, 30)
+    assert_valid_path(improved, finder, 30)
+    assert improved.distance() <= greedy.distance()
+
+
+@pytest.mark.parametrize("local_search", [False, True])
+def test_aco_iter_yields_improving_k_point_paths(finder, local_search):
+    paths = list(quiet(lambda: list(finder.aco_iter(num_ants=10, num_iterations=15, seed=2, local_search=local_search))))
+    lengths = [p.distance() for p in paths]
+    for path in paths:
+        assert_valid_path(path, finder, 32)
+    assert all(a > b for a, b in zip(lengths, lengths[1:]))
+    assert finder.aco_stats['best_length'] == pytest.approx(lengths[-1])
+    assert finder.aco_stats['stop'] == 'iterations'
+
+
+def test_aco_stop_reasons(finder):
+    path = quiet(finder.aco_path, time_limit=0, seed=1)
+    assert_valid_path(path, finder, 32)
+    assert finder.aco_stats['stop'] == 'time_limit' and finder.aco_stats['iterations'] == 0
+
+    quiet(finder.aco_path, num_iterations=None, max_stagnation=3, num_ants=5, seed=1)
+    assert finder.aco_stats['stop'] == 'stagnation'
+
+    quiet(finder.aco_path, num_iterations=5, target_length=float('inf'), seed=1)
+    assert finder.aco_stats['stop'] == 'target_length' and finder.aco_stats['iterations'] == 0
+
+    generator = finder.aco_iter(num_ants=5, num_iterations=50, seed=1)
+    quiet(next, generator)
+    generator.close()
+    assert finder.aco_stats['stop'] == 'closed'
+
+    with pytest.raises(ValueError):
+        next(finder.aco_iter(num_iterations=None))
+
+
+def test_aco_node_limit_falls_back_to_greedy():
+    points = random_points(3, 1500)
+    finder = PathFinding(points, points.point(0), points.point(1), k=30, aco_node_limit=1000)
+    path = quiet(finder.aco_path, num_ants=5, num_iterations=5)
+    assert_valid_path(path, finder, 32)
+    assert finder.aco_stats['stop'] == 'node_limit'
+
+
+def test_session_matches_single_queries():
+    points = random_points(4, 5000)
+    session = PathFindingSession(Map("m", points), k=30, candidate_list_size=10, max_cache_bytes=4 * 1024 * 1024)
+    for i in range(6):
+        start, end = points.point(i), points.point(i + 100)
+        path = quiet(session.aco_path, start, end, num_ants=5, num_iterations=3, seed=1)
+
+        clusters, selected = quiet(run, points, start, end, cluster_size=100, map_size=10000, k=30)
+        selection = get_all_points_in_clusters(get_clusters_from_ids(clusters, selected))
+        single = PathFinding(selection, start, end, k=30, candidate_list_size=10)
+        expected = quiet(single.aco_path, num_ants=5, num_iterations=3, seed=1)
+        assert [(p.x, p.y) for p in path.points] == [(p.x, p.y) for p in expected.points]
+
+        for cache in (session._queries, session._oracles):
+            assert len(cache) == 1 or sum(value.nbytes for value in cache.values()) <= session.max_cache_bytes
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+import modules.local_search as local_search
+from modules.aco import AntColony, MultiColony
+from modules.common.point import pairwise_distances
+from modules.local_search import improve_path
+from modules.path_finding import HAS_NATIVE_TOURS, aco_lib
+
+
+def random_nodes(seed, n):
+    rng = np.random.default_rng(seed)
+    xs = rng.integers(0, 1000, n).astype(float)
+    ys = rng.integers(0, 1000, n).astype(float)
+    return xs, ys, pairwise_distances(xs, ys, xs, ys)
+
+
+def assert_valid_tour(tour, n, k):
+    assert len(tour) == k + 2
+    assert tour[0] == 0 and tour[-1] == n - 1
+    inner = tour[1:-1]
+    assert len(set(inner.tolist())) == k
+    assert ((inner >= 1) & (inner <= n - 2)).all()
+
+
+def path_length(tour, xs, ys):
+    return float(np.hypot(np.diff(xs[tour]), np.diff(ys[tour])).sum())
+
+
+@pytest.fixture(params=["numpy", "c"])
+def native(request):
+    if request.param == "numpy":
+        return None
+    if not HAS_NATIVE_TOURS:
+        pytest.skip("C build_tours not available")
+    return aco_lib
+
+
+@pytest.mark.parametrize("candidates", [None, 5])
+def test_build_tours_valid(native, candidates):
+    xs, ys, distances = random_nodes(1, 60)
+    lists = None
+    if candidates:
+        lists = np.argsort(distances[:, 1:-1], axis=1)[:, 1:candidates + 1] + 1
+    colony = AntColony(distances, 30, seed=3, native=native, candidate_lists=lists)
+    for _ in range(3):
+        tours, lengths = colony.iterate(8)
+        for tour, length in zip(tours, lengths):
+            assert_valid_tour(tour, 60, 30)
+            assert length == pytest.approx(distances[tour[:-1], tour[1:]].sum())
+    assert colony.best_length <= lengths.min()
+
+
+def test_multi_colony_is_deterministic(native):
+    _, _, distances = random_nodes(2, 40)
+    results = []
+    for _ in range(2):
+        with MultiColony(distances, 20, colonies=3, seed=5, native=native) as colony:
+            for _ in range(4):
+                colony.iterate(5)
+            assert_valid_tour(colony.best_tour, 40, 20)
+            results.append((colony.best_length, colony.best_tour.tolist()))
+    assert results[0] == results[1]
+
+
+@pytest.mark.parametrize("use_c", [False, True], ids=["numpy", "c"])
+def test_improve_path_keeps_ends_and_nodes(use_c):
+    if use_c and not local_search.USE_C_IMPLEMENTATION:
+        pytest.skip("C improve_path not available")
+    for seed in range(5):
+        xs, ys, _ = random_nodes(seed, 200)
+        rng = np.random.default_rng(seed)
+        tour = np.concatenate(([0], 1 + rng.permutation(198)[:120], [199]))
+        improved = improve_path(tour, xs, ys, use_c=use_c)
+        assert improved[0] == 0 and improved[-1] == 199
+        assert sorted(improved.tolist()) == sorted(tour.tolist())
+        assert path_length(improved, xs, ys) < path_length(tour, xs, ys)
+
+
+def test_improve_path_c_matches_numpy():
+    if not local_search.USE_C_IMPLEMENTATION:
+        pytest.skip("C improve_path not available")
+    for seed in range(5):
+        xs, ys, _ = random_nodes(seed, 150)
+        tour = np.concatenate(([0], np.random.default_rng(seed).permutation(np.arange(1, 149)), [149]))
+        assert improve_path(tour, xs, ys, use_c=True).tolist() == improve_path(tour, xs, ys, use_c=False).tolist()
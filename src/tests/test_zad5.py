@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from modules.zad5 import find_border_rectangle
+
+
+def brute_force(grid, threshold):
+    """Every rectangle touching the border, as in the original nested-slice search."""
+    size = grid.shape[0]
+    rectangles = []
+    for a in range(size):
+        for b in range(size):
+            for c in range(b, size):
+                candidates = [
+                    ('top', 0, b, a, c),
+                    ('bottom', a, b, size - 1, c),
+                    ('left', b, 0, c, a),
+                    ('right', b, a, c, size - 1),
+                ]
+                for side, i1, j1, i2, j2 in candidates:
+                    total = grid[i1:i2 + 1, j1:j2 + 1].sum()
+                    if total >= threshold:
+                        rectangles.append((side, i1, j1, i2, j2, (i2 - i1 + 1) * (j2 - j1 + 1), total))
+    if not rectangles:
+        return None
+    # Kolejność boków jak w pętlach oryginału - sortowanie stabilne
+    order = {'top': 0, 'bottom': 1, 'left': 2, 'right': 3}
+    rectangles.sort(key=lambda r: order[r[0]])
+    rectangles.sort(key=lambda r: (r[5], -r[6]))
+    return tuple(v if isinstance(v, str) else int(v) for v in rectangles[0])
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(60):
+        n = int(rng.integers(1, 10))
+        grid = rng.integers(0, 4, (n, n)) * (rng.random((n, n)) < 0.5)
+        threshold = int(rng.integers(0, grid.sum() + 3))
+        found = find_border_rectangle(grid, threshold)
+        expected = brute_force(grid, threshold)
+        if expected is None:
+            assert found is None
+        else:
+            assert tuple(v if isinstance(v, str) else int(v) for v in found) == expected
+
+
+def test_unreachable_threshold():
+    assert find_border_rectangle(np.ones((5, 5), dtype=np.int64), 26) is None